@@ -0,0 +1,90 @@
+"""
+Micro-benchmark for the dangerous-command check.
+
+Compares the compiled single-pass matcher with the old per-pattern
+re.search loop while growing the rule set with synthetic site rules
+(written to a config file and loaded the same way the terminal does).
+
+    python benchmarks/bench_dangerous.py [--commands 2000] [--rules 0,100,300,1000]
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import inline_terminal as it
+
+SAMPLE_COMMANDS = [
+    "ls -la",
+    "git status",
+    "pip install -r requirements.txt",
+    "python manage.py runserver 0.0.0.0:8000",
+    "docker compose up -d --build",
+    "find . -name '*.pyc' -delete",
+    "rm -rf ./build/ dist/",
+    "grep -rn 'TODO' src/ | sort | uniq -c | sort -rn | head -20",
+    "sudo rm -rf /",
+    "killall Finder",
+    "shutdown -h now",
+    "kubectl get pods --all-namespaces -o wide",
+]
+
+
+def write_site_rules(path, count):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# synthetic site rules\n")
+        for i in range(count):
+            if i < 5:
+                # a handful of rules without a literal prefix exercise the fallback path
+                f.write(rf"(?:--purge-all|--wipe){i}\b" + "\n")
+            elif i % 3 == 0:
+                f.write(rf"\bsitetool{i}\b" + "\n")
+            else:
+                f.write(rf"sitetool{i % 50}\s+--purge\s+prod{i}" + "\n")
+
+
+def naive_is_dangerous(patterns, cmd):
+    return any(re.search(p, cmd, re.IGNORECASE) for p in patterns)
+
+
+def time_per_command(fn, commands):
+    start = time.perf_counter()
+    for cmd in commands:
+        fn(cmd)
+    return (time.perf_counter() - start) / len(commands) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--commands", type=int, default=2000)
+    parser.add_argument("--rules", default="0,100,300,1000")
+    args = parser.parse_args()
+
+    commands = (SAMPLE_COMMANDS * (args.commands // len(SAMPLE_COMMANDS) + 1))[:args.commands]
+
+    print(f"{'site rules':>10} {'total':>6} {'compiled us/cmd':>16} {'naive us/cmd':>13} {'build ms':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in (int(n) for n in args.rules.split(",")):
+            path = os.path.join(tmp, f"rules_{count}.txt")
+            write_site_rules(path, count)
+            patterns = it.DANGEROUS_COMMAND_PATTERNS + it.load_dangerous_patterns(path)
+
+            start = time.perf_counter()
+            matcher = it.DangerousCommandMatcher(patterns)
+            build_ms = (time.perf_counter() - start) * 1e3
+
+            for cmd in SAMPLE_COMMANDS:
+                assert (matcher.match(cmd) is not None) == naive_is_dangerous(patterns, cmd), cmd
+
+            compiled = time_per_command(matcher.match, commands)
+            # the old loop gets slow enough that a sample is plenty
+            naive = time_per_command(lambda c: naive_is_dangerous(patterns, c), commands[:200])
+            print(f"{count:>10} {len(patterns):>6} {compiled:>16.2f} {naive:>13.2f} {build_ms:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
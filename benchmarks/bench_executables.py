@@ -0,0 +1,93 @@
+"""
+First-word completion against a synthetic PATH of executables.
+
+Fills --dirs directories with --executables executables in total, points PATH
+at them and times the index build, a rebuild after one directory changed and
+after PATH gained a directory (as `activate` does), then the per-keystroke
+cost of the merged history + executable completion.
+
+    python benchmarks/bench_executables.py [--executables 5000] [--dirs 20]
+"""
+import argparse
+import os
+import random
+import stat
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from prompt_toolkit.document import Document
+
+import inline_terminal as it
+
+WORDS = ["git", "python", "docker", "kube", "node", "cargo", "make", "grep", "ssh", "pip",
+         "npm", "gcc", "clang", "rust", "java", "perl", "ruby", "go", "terraform", "aws"]
+
+
+def make_executable(path):
+    with open(path, "w") as f:
+        f.write("#!/bin/sh\n")
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+
+
+def populate(root, dirs, executables, rng):
+    paths = []
+    for d in range(dirs):
+        path = os.path.join(root, f"bin{d:02d}")
+        os.mkdir(path)
+        paths.append(path)
+    for i in range(executables):
+        name = f"{rng.choice(WORDS)}-{rng.choice(WORDS)}{i}"
+        make_executable(os.path.join(paths[i % dirs], name))
+    return paths
+
+
+def timed(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--executables", type=int, default=5000)
+    parser.add_argument("--dirs", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    rng = random.Random(1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = populate(tmp, args.dirs, args.executables, rng)
+        original_path = os.environ["PATH"]
+        os.environ["PATH"] = os.pathsep.join(paths)
+        index = it.executable_index
+
+        print(f"build ({args.executables} executables)     {timed(index.refresh) * 1e3:9.2f} ms")
+        print(f"refresh, nothing changed         {timed(index.refresh, 20) * 1e3:9.2f} ms")
+        make_executable(os.path.join(paths[0], "newtool"))
+        print(f"refresh, one directory changed   {timed(index.refresh) * 1e3:9.2f} ms")
+        venv_bin = os.path.join(tmp, "venv-bin")
+        os.mkdir(venv_bin)
+        make_executable(os.path.join(venv_bin, "python"))
+        os.environ["PATH"] = venv_bin + os.pathsep + os.environ["PATH"]
+        print(f"refresh, PATH gained a directory {timed(index.refresh) * 1e3:9.2f} ms")
+
+        for i in range(200):
+            it.suggestion_index.add(f"{rng.choice(WORDS)} status --flag{i}")
+
+        completer = it.completer
+        for label, typed in (("prefix", "python-gi"), ("fuzzy", "dkrgit")):
+            keystrokes = [typed[:i] for i in range(1, len(typed) + 1)]
+            per_key = timed(lambda: [list(completer.get_completions(Document(text), None)) for text in keystrokes],
+                            args.repeat) / len(keystrokes)
+            worst = max(timed(lambda: list(completer.get_completions(Document(text), None)), args.repeat)
+                        for text in keystrokes)
+            print(f"{label:<6} completion, per keystroke  {per_key * 1e6:9.1f} us (worst {worst * 1e6:.1f} us)")
+        os.environ["PATH"] = original_path
+
+
+if __name__ == "__main__":
+    main()
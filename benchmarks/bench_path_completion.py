@@ -0,0 +1,75 @@
+"""
+Per-keystroke cost of `cd` path completion on a synthetic directory.
+
+Compares PathCompleter (cached, scandir-based, bisect lookups) with the old
+iterdir() + is_dir() scan, typing a path one character at a time.
+
+    python benchmarks/bench_path_completion.py [--entries 100000]
+"""
+import argparse
+import os
+import pathlib
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from prompt_toolkit.document import Document
+
+import inline_terminal as it
+
+
+def old_completions(base_dir, partial_name):
+    matches = []
+    for entry in pathlib.Path(base_dir).iterdir():
+        if entry.name.lower().startswith(partial_name):
+            matches.append((entry.name, entry.is_dir()))
+    return matches
+
+
+def populate(path, entries):
+    for i in range(entries):
+        name = os.path.join(path, f"module_{i:06d}")
+        if i % 10 == 0:
+            os.mkdir(name)
+        else:
+            open(name, "w").close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        populate(tmp, args.entries)
+        print(f"created {args.entries} entries in {time.perf_counter() - start:.1f} s")
+
+        os.chdir(tmp)
+        typed = "cd module_0421"
+        keystrokes = [typed[:i] for i in range(len("cd ") + 1, len(typed) + 1)]
+
+        start = time.perf_counter()
+        first = list(it.PathCompleter().get_completions(Document("cd m"), None))
+        cold_ms = (time.perf_counter() - start) * 1e3
+
+        start = time.perf_counter()
+        for text in keystrokes:
+            list(it.PathCompleter().get_completions(Document(text), None))
+        new_ms = (time.perf_counter() - start) * 1e3 / len(keystrokes)
+
+        start = time.perf_counter()
+        for text in keystrokes:
+            old_completions(tmp, text.split()[-1].lower())
+        old_ms = (time.perf_counter() - start) * 1e3 / len(keystrokes)
+
+        print(f"first listing (cold cache)   {cold_ms:8.2f} ms  ({len(first)} completions, capped)")
+        print(f"cached, per keystroke        {new_ms:8.3f} ms")
+        print(f"old iterdir, per keystroke   {old_ms:8.2f} ms")
+        os.chdir("/")
+
+
+if __name__ == "__main__":
+    main()
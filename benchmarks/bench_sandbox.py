@@ -0,0 +1,74 @@
+"""
+Sandbox preview latency: cold `docker run` per preview versus the warm
+SandboxPool. Runs against benchmarks/fake_docker.py installed on PATH as
+`docker`, so no daemon is needed; pass --real-docker to use the real one.
+
+    python benchmarks/bench_sandbox.py [--previews 10] [--start-delay 0.5]
+"""
+import argparse
+import os
+import stat
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+import inline_terminal as it
+
+
+def install_fake_docker(bin_dir, start_delay, state_dir):
+    path = os.path.join(bin_dir, "docker")
+    with open(path, "w") as f:
+        f.write(f"#!/bin/sh\nexec {sys.executable} {os.path.join(HERE, 'fake_docker.py')} \"$@\"\n")
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    os.environ["PATH"] = bin_dir + os.pathsep + os.environ["PATH"]
+    os.environ["FAKE_DOCKER_START_DELAY"] = str(start_delay)
+    os.environ["FAKE_DOCKER_STATE"] = state_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--previews", type=int, default=10)
+    parser.add_argument("--pool-size", type=int, default=2)
+    parser.add_argument("--start-delay", type=float, default=0.5,
+                        help="simulated container start-up time of the fake docker")
+    parser.add_argument("--real-docker", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if not args.real_docker:
+            install_fake_docker(tmp, args.start_delay, os.path.join(tmp, "state"))
+
+        cmd = "echo preview && ls / > /dev/null"
+
+        start = time.perf_counter()
+        for _ in range(args.previews):
+            it.subprocess.run(["docker", "run", "--rm", *it.SANDBOX_LIMITS, it.SANDBOX_IMAGE, "bash", "-c", cmd],
+                              capture_output=True, timeout=60)
+        cold = (time.perf_counter() - start) / args.previews
+
+        pool = it.SandboxPool(size=args.pool_size, docker="docker")
+        pool.start()
+        # Let the first containers come up, as they do while Gemini answers
+        pool.release(pool.acquire())
+        start = time.perf_counter()
+        for _ in range(args.previews):
+            output = it.SandboxPreview(cmd, pool=pool).wait()
+            assert "preview" in output, output
+            # Pace previews like a user reading the plan, so recycling keeps up
+            time.sleep(args.start_delay / args.pool_size)
+        pooled = (time.perf_counter() - start) / args.previews - args.start_delay / args.pool_size
+        pool.close()
+
+        print(f"cold docker run per preview  {cold * 1e3:8.1f} ms")
+        print(f"warm pool (docker exec)      {pooled * 1e3:8.1f} ms")
+
+        if not args.real_docker:
+            leaked = os.listdir(os.path.join(tmp, "state"))
+            print(f"containers left after close  {len(leaked)}")
+
+
+if __name__ == "__main__":
+    main()
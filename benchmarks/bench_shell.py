@@ -0,0 +1,54 @@
+"""
+Commands/sec: a fresh shell per command (run_streaming) versus the
+persistent ShellSession.
+
+    python benchmarks/bench_shell.py [--commands 300]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import inline_terminal as it
+
+WORKLOAD = ["true", "echo hello", "ls > /dev/null", "export X=1", "pwd"]
+
+
+def commands_per_second(run, count):
+    real_stdout = sys.stdout
+    sys.stdout = io.TextIOWrapper(open(os.devnull, "wb"))
+    try:
+        start = time.perf_counter()
+        for i in range(count):
+            run(WORKLOAD[i % len(WORKLOAD)])
+        return count / (time.perf_counter() - start)
+    finally:
+        sys.stdout = real_stdout
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--commands", type=int, default=300)
+    args = parser.parse_args()
+
+    if os.name == "nt":
+        print("The persistent shell session needs a POSIX shell")
+        return
+
+    fresh = commands_per_second(it.run_streaming, args.commands)
+    session = it.ShellSession()
+    session.start()
+    try:
+        persistent = commands_per_second(session.run, args.commands)
+    finally:
+        session.close()
+
+    print(f"fresh shell per command   {fresh:8.1f} commands/sec")
+    print(f"persistent shell session  {persistent:8.1f} commands/sec  ({persistent / fresh:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
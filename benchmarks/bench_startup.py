@@ -0,0 +1,90 @@
+"""
+Cold-start benchmark: time-to-first-prompt and peak RSS.
+
+Each run starts a fresh interpreter, imports inline_terminal and enters
+main(); the first prompt records the timings and exits. Use
+--budget-ms in CI to fail when the median time-to-first-prompt regresses.
+
+    python benchmarks/bench_startup.py [--runs 10] [--budget-ms 400]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+CHILD = r"""
+import sys, time, json
+t0 = time.perf_counter()
+sys.path.insert(0, {root!r})
+import inline_terminal as it
+
+def first_prompt(*args, **kwargs):
+    try:
+        import resource
+        rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == "darwin":
+            rss_kb //= 1024
+    except ImportError:
+        rss_kb = None
+    print(json.dumps({{
+        "in_process_ms": (time.perf_counter() - t0) * 1e3,
+        "peak_rss_kb": rss_kb,
+        "heavy_modules": [m for m in ("google.genai", "dotenv", "nltk") if m in sys.modules],
+    }}), flush=True)
+    raise EOFError
+
+async def first_prompt_async(self, *args, **kwargs):
+    first_prompt()
+
+it.PromptSession.prompt_async = first_prompt_async
+it.main([])
+"""
+
+
+def run_once():
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", CHILD.format(root=ROOT)],
+        capture_output=True, text=True, timeout=60
+    )
+    wall_ms = (time.perf_counter() - start) * 1e3
+    for line in proc.stdout.splitlines():
+        if line.startswith("{"):
+            result = json.loads(line)
+            result["wall_ms"] = wall_ms
+            return result
+    raise RuntimeError(f"child did not reach the prompt:\n{proc.stdout}\n{proc.stderr}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="fail if the median time-to-first-prompt (wall clock) exceeds this")
+    args = parser.parse_args()
+
+    results = [run_once() for _ in range(args.runs)]
+    wall = statistics.median(r["wall_ms"] for r in results)
+    in_process = statistics.median(r["in_process_ms"] for r in results)
+    rss = [r["peak_rss_kb"] for r in results if r["peak_rss_kb"] is not None]
+
+    print(f"runs                          {args.runs}")
+    print(f"time to first prompt (wall)   {wall:.1f} ms median")
+    print(f"import + setup (in process)   {in_process:.1f} ms median")
+    if rss:
+        print(f"peak RSS at first prompt      {max(rss) / 1024:.1f} MiB")
+    heavy = sorted({m for r in results for m in r["heavy_modules"]})
+    print(f"heavy modules loaded          {', '.join(heavy) if heavy else 'none'}")
+
+    if args.budget_ms is not None and wall > args.budget_ms:
+        print(f"FAIL: {wall:.1f} ms is over the {args.budget_ms:.1f} ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
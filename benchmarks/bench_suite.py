@@ -0,0 +1,162 @@
+"""
+Benchmark suite for the terminal's core pieces, driven by synthetic
+workloads and a local fake Gemini (no network, no Docker daemon needed).
+
+    python benchmarks/bench_suite.py [--quick] [--gemini-latency 0.3] [--malformed-rate 0.2]
+
+Every row is one workload; times are per operation.
+"""
+import argparse
+import io
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+# Keep the suite's caches and history away from the user's own
+os.environ.setdefault("INLINE_HOME", tempfile.mkdtemp(prefix="inline-bench-"))
+os.environ.setdefault("INLINE_TRACE", "0")
+
+from prompt_toolkit.document import Document
+
+import inline_terminal as it
+from bench_sandbox import install_fake_docker
+from fake_gemini import FakeGeminiClient
+
+WORDS = ["git", "docker", "kubectl", "pip", "python", "npm", "make", "ls", "grep", "find", "ssh", "curl"]
+FLAGS = ["-la", "--all", "-n", "--verbose", "-rf", "install", "status", "build", "run", "logs", "--force"]
+
+
+def synthetic_command(rng, length=4):
+    return " ".join([rng.choice(WORDS)] + [rng.choice(FLAGS) + str(rng.randint(0, 500)) for _ in range(length)])
+
+
+def measure(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return statistics.median(times), times[min(len(times) - 1, int(0.95 * len(times)))]
+
+
+def report(name, p50, p95):
+    def fmt(seconds):
+        return f"{seconds * 1e6:.1f} us" if seconds < 1e-3 else f"{seconds * 1e3:.2f} ms"
+    print(f"{name:<44}{fmt(p50):>12}{fmt(p95):>12}")
+
+
+def quiet(fn):
+    """Run fn with stdout discarded (the execute pipeline prints a lot)."""
+    def wrapper():
+        real_stdout = sys.stdout
+        sys.stdout = io.TextIOWrapper(open(os.devnull, "wb"))
+        try:
+            return fn()
+        finally:
+            sys.stdout = real_stdout
+    return wrapper
+
+
+def bench_dangerous(rng, scale):
+    long_lines = [synthetic_command(rng, length=60) for _ in range(200)]
+    lines = iter(long_lines * scale)
+    report("dangerous check, 60-arg command line", *measure(lambda: it.is_dangerous(next(lines)), 200 * scale))
+
+
+def bench_suggestions(rng, scale):
+    index = it.SuggestionIndex(max_entries=5000)
+    history = [synthetic_command(rng) for _ in range(20000 * scale)]
+    commands = iter(history)
+    report(f"suggestion index add ({len(history)} history)", *measure(lambda: index.add(next(commands)), len(history)))
+
+    completer = it.SuggestionCompleter(index)
+    auto = it.AutoSuggestCmd()
+    saved = it.suggestion_index
+    it.suggestion_index = index
+    try:
+        prefixes = [cmd[:rng.randint(1, 12)] for cmd in history[:500]]
+        docs = iter([Document(p) for p in prefixes] * 4)
+        report("tab completion (SuggestionCompleter)", *measure(lambda: list(completer.get_completions(next(docs), None)), 2000))
+        docs = iter([Document(p) for p in prefixes] * 4)
+        report("ghost text (AutoSuggestCmd)", *measure(lambda: auto.get_suggestion(None, next(docs)), 2000))
+    finally:
+        it.suggestion_index = saved
+
+
+def bench_paths(scale):
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(10000 * scale):
+            open(os.path.join(tmp, f"file_{i:06d}"), "w").close()
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            completer = it.PathCompleter()
+            list(completer.get_completions(Document("cd f"), None))
+            docs = iter([Document("cd file_00" + str(i % 10)) for i in range(500)])
+            report(f"path completion ({10000 * scale} entries, cached)", *measure(lambda: list(completer.get_completions(next(docs), None)), 500))
+        finally:
+            os.chdir(cwd)
+
+
+def bench_parsing(rng):
+    answers = [
+        "```python\n['dir', 'cd ..', 'pip list']\n```",
+        "['git status', 'git add .']",
+        "Here you go:\n['make', 'make test']\nGood luck!",
+        "Sorry, I cannot help with that.",
+    ] * 100
+    texts = iter(answers * 5)
+    report("parse_command_list (mixed answers)", *measure(lambda: it.parse_command_list(next(texts)), 2000))
+
+
+def bench_compaction(rng, scale):
+    history = [synthetic_command(rng) + (" --token=abc123" if rng.random() < 0.1 else "") for _ in range(100000 * scale)]
+    report(f"compact_history ({len(history)} commands)", *measure(lambda: it.compact_history(history), 5))
+
+
+def bench_execute(args):
+    it.set_gemini_client(FakeGeminiClient(latency=args.gemini_latency, malformed_rate=args.malformed_rate,
+                                          error_rate=args.error_rate, seed=1))
+    with tempfile.TemporaryDirectory() as tmp:
+        install_fake_docker(tmp, args.docker_start_delay, os.path.join(tmp, "state"))
+        it.sandbox_pool = it.SandboxPool(size=2, docker="docker")
+        try:
+            flow = quiet(lambda: it.execute_flow("list the files", refresh=True, confirm=lambda question, **_: False))
+            flow()  # let the pool warm up
+            report(f"inline --execute end to end (fake gemini {args.gemini_latency * 1e3:.0f} ms)", *measure(flow, args.execute_runs))
+            cached = quiet(lambda: it.execute_flow("list the files", confirm=lambda question, **_: False))
+            report("inline --execute, cached answer", *measure(cached, args.execute_runs))
+        finally:
+            it.sandbox_pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="smaller workloads")
+    parser.add_argument("--gemini-latency", type=float, default=0.3)
+    parser.add_argument("--malformed-rate", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--docker-start-delay", type=float, default=0.5)
+    parser.add_argument("--execute-runs", type=int, default=10)
+    args = parser.parse_args()
+
+    scale = 1 if args.quick else 3
+    rng = random.Random(42)
+    print(f"{'workload':<44}{'p50':>12}{'p95':>12}")
+    bench_dangerous(rng, scale)
+    bench_suggestions(rng, scale)
+    bench_paths(scale)
+    bench_parsing(rng)
+    bench_compaction(rng, scale)
+    bench_execute(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Venv index and environment switching on a synthetic project tree.
+
+Builds --projects project directories (a few with a pyvenv.cfg venv, the rest
+with ordinary subdirectories), then times the first scan, an incremental
+rescan, `activate` completion per keystroke and an activate/deactivate round
+trip with a short and a very long PATH.
+
+    python benchmarks/bench_venv.py [--projects 500]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from prompt_toolkit.document import Document
+
+import inline_terminal as it
+
+
+def populate(root, projects):
+    version = f"{sys.version_info.major}.{sys.version_info.minor}"
+    for i in range(projects):
+        project = os.path.join(root, f"project_{i:04d}")
+        for sub in ("src", "tests", "docs"):
+            os.makedirs(os.path.join(project, sub, "pkg"))
+        if i % 10 == 0:
+            venv = os.path.join(project, ".venv")
+            os.makedirs(os.path.join(venv, "bin"))
+            os.makedirs(os.path.join(venv, "lib", f"python{version}", "site-packages"))
+            with open(os.path.join(venv, "pyvenv.cfg"), "w") as f:
+                f.write(f"home = /usr/bin\nversion = {sys.version.split()[0]}\n")
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--projects", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        populate(tmp, args.projects)
+        os.chdir(tmp)
+        index = it.venv_index
+
+        start = time.perf_counter()
+        index.scan(tmp)
+        print(f"first scan ({args.projects} projects)      {(time.perf_counter() - start) * 1e3:9.2f} ms, {len(index.venvs)} venvs")
+        print(f"incremental rescan                  {timed(lambda: index.scan(tmp), 10) * 1e3:9.2f} ms")
+
+        completer = it.completer
+        typed = "activate project_04"
+        keystrokes = [typed[:i] for i in range(len("activate ") + 1, len(typed) + 1)]
+        per_key = timed(lambda: [list(completer.get_completions(Document(text), None)) for text in keystrokes],
+                        args.repeat) / len(keystrokes)
+        print(f"activate completion                 {per_key * 1e6:9.1f} us/keystroke")
+
+        venv = os.path.join(tmp, "project_0000", ".venv")
+        original_path = os.environ["PATH"]
+        devnull = open(os.devnull, "w")
+        for entries in (10, 10000):
+            os.environ["PATH"] = os.pathsep.join(f"/opt/tool_{i}/bin" for i in range(entries))
+
+            def round_trip():
+                stdout, sys.stdout = sys.stdout, devnull
+                try:
+                    it.activate_venv(venv)
+                    it.deactivate_venv()
+                finally:
+                    sys.stdout = stdout
+            print(f"activate + deactivate, PATH={entries:<6}  {timed(round_trip, args.repeat) * 1e6:9.1f} us")
+        os.environ["PATH"] = original_path
+        os.chdir(os.path.dirname(tmp))
+
+
+if __name__ == "__main__":
+    main()
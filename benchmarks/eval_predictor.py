@@ -0,0 +1,85 @@
+"""
+Offline evaluation of the local next-command predictor.
+
+Replays a recorded history in order: before each command the predictor
+guesses the next one, then it is trained on the real command (the same
+online setting as in the terminal). Reports top-k accuracy and latency.
+
+    python benchmarks/eval_predictor.py --history commands.txt   # one command per line
+    python benchmarks/eval_predictor.py --db ~/.inline_terminal/history.db
+    python benchmarks/eval_predictor.py                          # synthetic workload
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import inline_terminal as it
+
+WORKFLOWS = [
+    ["git status", "git add .", "git commit -m wip", "git push"],
+    ["cd backend", "pip install -r requirements.txt", "python manage.py migrate", "python manage.py runserver"],
+    ["docker compose build", "docker compose up -d", "docker compose logs -f"],
+    ["make clean", "make", "make test"],
+    ["ls", "cd ..", "ls -la"],
+]
+
+
+def synthetic_history(length, seed=7):
+    rng = random.Random(seed)
+    history = []
+    while len(history) < length:
+        flow = rng.choice(WORKFLOWS)
+        # people skip steps and type one-offs now and then
+        history.extend(cmd for cmd in flow if rng.random() > 0.1)
+        if rng.random() < 0.2:
+            history.append(f"grep -rn todo{rng.randint(0, 50)} src/")
+    return history[:length]
+
+
+def load_history(args):
+    if args.history:
+        with open(args.history, encoding="utf-8", errors="replace") as f:
+            return [line.strip() for line in f if line.strip()]
+    if args.db:
+        conn = sqlite3.connect(args.db)
+        return [row[0] for row in conn.execute("SELECT command FROM history ORDER BY id")]
+    return synthetic_history(args.length)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--history", help="text file, one command per line")
+    parser.add_argument("--db", help="history.db written by the terminal")
+    parser.add_argument("--length", type=int, default=20000, help="length of the synthetic history")
+    parser.add_argument("--order", type=int, default=3)
+    parser.add_argument("--k", default="1,3,5")
+    args = parser.parse_args()
+
+    history = load_history(args)
+    ks = sorted(int(k) for k in args.k.split(","))
+    predictor = it.NgramPredictor(order=args.order)
+    hits = {k: 0 for k in ks}
+    predict_time = 0.0
+
+    for cmd in history:
+        start = time.perf_counter()
+        predicted = predictor.predict(k=ks[-1])
+        predict_time += time.perf_counter() - start
+        for k in ks:
+            if cmd in predicted[:k]:
+                hits[k] += 1
+        predictor.observe(cmd)
+
+    print(f"commands evaluated  {len(history)}")
+    for k in ks:
+        print(f"top-{k} accuracy      {hits[k] / max(len(history), 1):.1%}")
+    print(f"mean predict time   {predict_time / max(len(history), 1) * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Stand-in for the `docker` CLI, so the sandbox code can be exercised
+without a daemon. Install it on PATH as `docker` (see bench_sandbox.py).
+
+Supports `run` (foreground and -d, with --label), `exec`, `rm -f` and
+`ps -a --filter label=KEY --format ...` (prints "ID LABEL-VALUE"). Commands
+run on the host with bash. FAKE_DOCKER_START_DELAY adds container start-up
+time, FAKE_DOCKER_RUN_FAIL=1 makes `run` fail like a missing image, and
+FAKE_DOCKER_STATE is the directory that tracks live containers.
+"""
+import json
+import os
+import sys
+import time
+import uuid
+
+
+def main(argv):
+    state = os.environ.get("FAKE_DOCKER_STATE", "/tmp/fake-docker")
+    os.makedirs(state, exist_ok=True)
+    start_delay = float(os.environ.get("FAKE_DOCKER_START_DELAY", "0.5"))
+    action, args = argv[0], argv[1:]
+
+    if action == "run":
+        time.sleep(start_delay)
+        if os.environ.get("FAKE_DOCKER_RUN_FAIL") == "1":
+            print("Unable to find image: fake docker was told to fail", file=sys.stderr)
+            return 125
+        if "-d" in args:
+            labels = {}
+            for flag, value in zip(args, args[1:]):
+                if flag == "--label":
+                    key, _, label = value.partition("=")
+                    labels[key] = label
+            container_id = uuid.uuid4().hex
+            with open(os.path.join(state, container_id), "w") as f:
+                json.dump({"labels": labels}, f)
+            print(container_id)
+            return 0
+        # docker run ... IMAGE bash -c CMD: the command is the last argument.
+        # exec, so killing the docker client kills the command as with real docker
+        os.execvp("bash", ["bash", "-c", args[-1]])
+
+    if action == "exec":
+        container_id, command = args[0], args[-1]
+        if not os.path.exists(os.path.join(state, container_id)):
+            print(f"Error: No such container: {container_id}", file=sys.stderr)
+            return 1
+        os.execvp("bash", ["bash", "-c", command])
+
+    if action == "rm":
+        for container_id in (a for a in args if not a.startswith("-")):
+            try:
+                os.remove(os.path.join(state, container_id))
+            except OSError:
+                pass
+        return 0
+
+    if action == "ps":
+        key = next((a[len("label="):] for a in args if a.startswith("label=")), None)
+        for container_id in sorted(os.listdir(state)):
+            try:
+                with open(os.path.join(state, container_id)) as f:
+                    labels = json.load(f).get("labels", {})
+            except (OSError, ValueError):
+                labels = {}
+            if key is None or key in labels:
+                print(f"{container_id} {labels.get(key, '')}")
+        return 0
+
+    print(f"fake docker: unsupported command {action}", file=sys.stderr)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
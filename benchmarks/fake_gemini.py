@@ -0,0 +1,66 @@
+"""
+Local stand-in for the Gemini API, installed with
+inline_terminal.set_gemini_client(FakeGeminiClient(...)).
+
+It answers the three prompts the terminal sends (ask, execute, suggest)
+with canned text after a configurable latency. A share of answers can be
+malformed (not a parsable list) and a share of calls can fail outright,
+which exercises the parsing, retry and backoff paths offline.
+"""
+import random
+import threading
+import time
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModels:
+    def __init__(self, client):
+        self._client = client
+
+    def _answer(self, contents):
+        client = self._client
+        with client.lock:
+            client.calls += 1
+            roll = client.rng.random()
+            fail = client.rng.random() < client.error_rate
+        if client.latency:
+            time.sleep(client.latency)
+        if fail:
+            raise RuntimeError("fake gemini: simulated 503")
+        malformed = roll < client.malformed_rate
+        if "Python list of shell commands" in contents:
+            if malformed:
+                return "Sure! First run echo hello, then list the files."
+            return "```python\n" + repr(client.execute_answer) + "\n```"
+        if "predict the next 5 cmds" in contents:
+            if malformed:
+                return "git status, git add ., git commit"
+            return repr(client.suggest_answer)
+        return client.ask_answer
+
+    def generate_content(self, model, contents):
+        return FakeResponse(self._answer(contents))
+
+    def generate_content_stream(self, model, contents):
+        text = self._answer(contents)
+        for start in range(0, len(text), 8):
+            yield FakeResponse(text[start:start + 8])
+
+
+class FakeGeminiClient:
+    def __init__(self, latency=0.0, malformed_rate=0.0, error_rate=0.0, seed=0,
+                 execute_answer=None, suggest_answer=None, ask_answer="ls -la"):
+        self.latency = latency
+        self.malformed_rate = malformed_rate
+        self.error_rate = error_rate
+        self.execute_answer = execute_answer or ["echo hello", "ls"]
+        self.suggest_answer = suggest_answer or ["git status", "git add .", "git commit -m wip", "git push", "ls"]
+        self.ask_answer = ask_answer
+        self.calls = 0
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.models = FakeModels(self)
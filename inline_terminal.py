@@ -3,29 +3,53 @@ import os
 import threading
 import sys
 import site
-from prompt_toolkit import prompt
-from prompt_toolkit.completion import WordCompleter, Completer, Completion
+from prompt_toolkit import PromptSession
+from prompt_toolkit.completion import Completer, Completion
 from prompt_toolkit.auto_suggest import AutoSuggest, Suggestion
 from prompt_toolkit.key_binding import KeyBindings
 from prompt_toolkit.formatted_text import HTML
-from prompt_toolkit.history import InMemoryHistory
+from prompt_toolkit.history import History
+from prompt_toolkit.patch_stdout import patch_stdout
 import re
 import ast
 import time
-from google import genai
-from dotenv import load_dotenv
-import pathlib
-import nltk
+import random
+import json
+import hashlib
+import platform
+from collections import Counter, OrderedDict, deque
+import shlex
+import uuid
+import atexit
+import bisect
+import math
+import queue
+import sqlite3
+import functools
+import concurrent.futures
+import contextlib
+import argparse
+import asyncio
+import signal
 
-load_dotenv()
-gemini_api_key = os.getenv('GEMINI_API_KEY')
+# google.genai and dotenv are imported on first use (see get_gemini_client) so the
+# prompt comes up without waiting for the AI machinery to load.
 
 help_method = '''
 inline help index
 inline --help  > opens the inline index
 inline --ask   > ask Query to the AI agent
 inline --execute > ask Query and it will execute that query also
+inline --ask --refresh / inline --execute --refresh > skip the cached answer
+inline --execute --parallel[=N] > run independent commands of the plan concurrently
+inline --execute --pipeline > ask for confirmation while the sandbox preview is still running
+inline --session on/off > run commands in one persistent shell (keeps export, alias, functions)
+inline --history <text> > search saved commands containing text (most used/recent first)
+inline --stats   > latency percentiles per phase (Gemini, sandbox, shell, completion)
+inline --cache   > show response cache stats (inline --cache clear to empty it)
 ctrl + e       > initiate the AI suggestions inside completer
+<command> &    > run a command (or inline --ask <query> &) in the background
+jobs           > list background jobs, fg [%N] waits for one, kill %N stops it
 inline --contact > Get Email ID of inline Help Team
 exit           > quit/exit from terminal
 '''
@@ -35,6 +59,140 @@ CONTACT DETAILS
 EMAIL ID : inlineterminal@gmail.com
 '''
 
+#Implementing the per-phase latency tracing
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ("tracer", "name", "start")
+
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.record(self.name, time.perf_counter() - self.start)
+        return False
+
+class LatencyTracer:
+    """
+    Per-phase latency histograms kept in process (a window of the latest
+    `window` samples per phase), optionally mirrored to a JSON-lines trace file.
+    When disabled, span() hands out a shared no-op and the decorators call
+    straight through, so the instrumented paths cost one attribute check.
+    """
+
+    def __init__(self, enabled=True, trace_path=None, window=2048):
+        self.enabled = enabled or bool(trace_path)
+        self.window = window
+        self._samples = {}
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._trace_file = None
+        if trace_path:
+            try:
+                self._trace_file = open(trace_path, "a", encoding="utf-8", buffering=1)
+            except OSError as e:
+                print(f"Could not open trace file {trace_path}: {e}")
+
+    def span(self, name):
+        return _Span(self, name) if self.enabled else _NULL_SPAN
+
+    def record(self, name, seconds):
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.window)
+            samples.append(seconds)
+            self._counts[name] += 1
+            if self._trace_file is not None:
+                self._trace_file.write(json.dumps({"ts": time.time(), "phase": name, "ms": round(seconds * 1e3, 3)}) + "\n")
+
+    def summary(self):
+        """{phase: {count, p50, p95, p99, max}} with times in milliseconds."""
+        with self._lock:
+            snapshot = {name: sorted(samples) for name, samples in self._samples.items()}
+            counts = dict(self._counts)
+        result = {}
+        for name, samples in sorted(snapshot.items()):
+            def pct(q):
+                return samples[min(len(samples) - 1, int(q * len(samples)))] * 1e3
+            result[name] = {"count": counts[name], "p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99), "max": samples[-1] * 1e3}
+        return result
+
+
+tracer = LatencyTracer(
+    enabled=os.getenv('INLINE_TRACE', '1') != '0',
+    trace_path=os.getenv('INLINE_TRACE_FILE')
+)
+
+def traced(name):
+    """Record each call of the decorated function under `name`."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                tracer.record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+def traced_generator(name):
+    """Like traced(), for generators: records the time spent producing items, not consuming them."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            gen = fn(*args, **kwargs)
+            if not tracer.enabled:
+                return gen
+            return _timed_iteration(name, gen)
+        return wrapper
+    return decorator
+
+def _timed_iteration(name, gen):
+    elapsed = 0.0
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(gen)
+            except StopIteration:
+                elapsed += time.perf_counter() - start
+                return
+            elapsed += time.perf_counter() - start
+            yield item
+    finally:
+        tracer.record(name, elapsed)
+
+def print_stats():
+    summary = tracer.summary()
+    if not tracer.enabled:
+        print("Tracing is off (INLINE_TRACE=0)")
+    elif not summary:
+        print("Nothing measured yet")
+    else:
+        print(f"{'phase':<18}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        for name, row in summary.items():
+            print(f"{name:<18}{row['count']:>8}{row['p50']:>10.2f}{row['p95']:>10.2f}{row['p99']:>10.2f}{row['max']:>10.2f}")
+    print()
+    print(f"response cache      {response_cache.stats()}")
+    print(f"prediction prompts  {compaction_stats}")
+    print(f"prediction worker   sent={prediction_worker.sent} dropped={prediction_worker.dropped}")
+
 #Implementing the $ DANGEROUS PATTERN $ recognisation
 DANGEROUS_COMMAND_PATTERNS = [
     # Linux & macOS
@@ -77,52 +235,431 @@ DANGEROUS_COMMAND_PATTERNS = [
 ]
 
 
+# Site-specific rules: one regex per line, '#' starts a comment
+DANGEROUS_PATTERNS_FILE = os.getenv(
+    'INLINE_DANGEROUS_PATTERNS_FILE',
+    os.path.join(os.path.expanduser("~"), ".inline_dangerous_patterns")
+)
+
+
+def load_dangerous_patterns(path=DANGEROUS_PATTERNS_FILE):
+    """
+    Read extra dangerous-command rules from a config file.
+    Missing files are fine; lines that do not compile are reported and skipped.
+    """
+    patterns = []
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                try:
+                    re.compile(line)
+                except re.error as e:
+                    print(f"Ignoring invalid dangerous pattern {line!r}: {e}")
+                    continue
+                patterns.append(line)
+    except OSError:
+        pass
+    return patterns
+
+
+_ANCHOR_RE = re.compile(r"(?:\\b)?([A-Za-z][A-Za-z0-9_-]*)")
+
+
+def _literal_anchor(pattern):
+    """
+    Return the literal word every match of `pattern` has to contain, or None.
+    Only the leading literal is used, and only when the pattern has no top-level '|'.
+    """
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "|" and depth == 0:
+            return None
+        i += 1
+
+    m = _ANCHOR_RE.match(pattern)
+    if not m:
+        return None
+    word = m.group(1)
+    # A quantifier after the word makes its last character optional
+    if pattern[m.end():m.end() + 1] in ("?", "*", "{"):
+        word = word[:-1]
+    return word.lower() if len(word) >= 2 else None
+
+
+def _trie_regex(words):
+    """Build a regex that matches the longest of `words` starting at a position."""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            return "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+class DangerousCommandMatcher:
+    """
+    Single-pass dangerous-command check.
+
+    Rules are compiled once. Rules that start with a literal word are indexed by
+    that word; one scan of the command with a trie-shaped regex finds every
+    indexed word it contains, so only those few rules are run. Rules without a
+    usable literal are folded into one combined alternation. The cost per command
+    therefore stays flat as site-specific rules are added.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self._by_anchor = {}
+        fallback = []
+        for index, pattern in enumerate(self.patterns):
+            anchor = _literal_anchor(pattern)
+            if anchor is None:
+                fallback.append(index)
+            else:
+                self._by_anchor.setdefault(anchor, []).append(
+                    (index, re.compile(pattern, re.IGNORECASE))
+                )
+
+        self._anchor_scan = None
+        if self._by_anchor:
+            self._anchor_scan = re.compile("(?=(" + _trie_regex(self._by_anchor) + "))")
+
+        self._fallback = None
+        self._fallback_each = []
+        # Compiled one by one too: the combined regex reports the leftmost hit,
+        # which is not always the earliest declared rule
+        self._fallback_rules = [(i, re.compile(self.patterns[i], re.IGNORECASE)) for i in fallback]
+        if fallback:
+            try:
+                self._fallback = re.compile(
+                    "|".join(f"(?P<r{i}>{self.patterns[i]})" for i in fallback),
+                    re.IGNORECASE
+                )
+            except re.error:
+                # e.g. rules with their own group names or inline flags
+                self._fallback_each = self._fallback_rules
+
+    def match(self, cmd):
+        """Return the first rule (in declaration order) that matches `cmd`, or None."""
+        best = None
+        if self._fallback is not None:
+            m = self._fallback.search(cmd)
+            if m:
+                best = min(int(name[1:]) for name, value in m.groupdict().items() if value is not None)
+                # Only a hit costs the extra searches, for the rules declared before it
+                for index, regex in self._fallback_rules:
+                    if index >= best:
+                        break
+                    if regex.search(cmd):
+                        best = index
+                        break
+        for index, regex in self._fallback_each:
+            if regex.search(cmd):
+                best = index
+                break
+
+        if self._anchor_scan is not None:
+            seen = set()
+            for m in self._anchor_scan.finditer(cmd.lower()):
+                word = m.group(1)
+                # Shorter anchors that are prefixes of the longest hit are present too
+                for end in range(2, len(word) + 1):
+                    anchor = word[:end]
+                    if anchor in seen or anchor not in self._by_anchor:
+                        continue
+                    seen.add(anchor)
+                    for index, regex in self._by_anchor[anchor]:
+                        if best is not None and index >= best:
+                            break
+                        if regex.search(cmd):
+                            best = index
+                            break
+
+        return None if best is None else self.patterns[best]
+
+
+_DANGER_MATCHER = DangerousCommandMatcher(DANGEROUS_COMMAND_PATTERNS + load_dangerous_patterns())
+
+
+def dangerous_rule(cmd):
+    """Return the dangerous-command rule that `cmd` triggers, or None."""
+    return _DANGER_MATCHER.match(cmd)
+
+
 def is_dangerous(cmd):
-    return any(re.search(p, cmd, re.IGNORECASE) for p in DANGEROUS_COMMAND_PATTERNS)
+    return _DANGER_MATCHER.match(cmd) is not None
 
 
 
 
 
+#Implementing the virtual environment index (pyvenv.cfg discovery and activation deltas)
+VENV_SCAN_DEPTH = int(os.getenv('INLINE_VENV_SCAN_DEPTH', '4'))
+VENV_SCAN_LIMIT = int(os.getenv('INLINE_VENV_SCAN_LIMIT', '20000'))   # most directories visited per scan
+VENV_SKIP_DIRS = {".git", ".hg", ".svn", "node_modules", "__pycache__", "site-packages",
+                  ".mypy_cache", ".pytest_cache", ".ruff_cache", ".cache", ".npm"}
+
+
+class VenvInfo:
+    """
+    One virtual environment, read from its pyvenv.cfg. The PATH prefix and the
+    site-packages directories are worked out once, for the venv's own Python.
+    """
+
+    def __init__(self, path, cfg_mtime, config):
+        self.path = path
+        self.cfg_mtime = cfg_mtime
+        self.config = config
+        version = config.get("version") or config.get("version_info") or ""
+        self.version = ".".join(version.split(".")[:3])
+        # python -m venv --prompt writes it quoted: prompt = 'name'
+        self.name = config.get("prompt", "").strip("'\"") or os.path.basename(path)
+        self.bin_dir = os.path.join(path, "Scripts" if os.name == "nt" else "bin")
+        self.path_prefix = self.bin_dir + os.pathsep
+        self.site_packages = self._find_site_packages()
+        self.uses = 0
+        self.last_used = 0.0
+
+    def _find_site_packages(self):
+        if os.name == "nt":
+            candidates = [os.path.join(self.path, "Lib", "site-packages")]
+        else:
+            major_minor = ".".join(self.version.split(".")[:2])
+            candidates = [os.path.join(self.path, "lib", f"python{major_minor}", "site-packages")] if major_minor else []
+            # pypy, or a pyvenv.cfg without a version
+            try:
+                with os.scandir(os.path.join(self.path, "lib")) as it:
+                    candidates += sorted(os.path.join(entry.path, "site-packages") for entry in it
+                                         if entry.name.startswith(("python", "pypy")))
+            except OSError:
+                pass
+        for candidate in candidates:
+            if os.path.isdir(candidate):
+                return candidate
+        return None
+
+    @staticmethod
+    def read(path):
+        """Parse `path`/pyvenv.cfg; None when `path` is not a venv."""
+        cfg_path = os.path.join(path, "pyvenv.cfg")
+        try:
+            cfg_mtime = os.stat(cfg_path).st_mtime_ns
+            with open(cfg_path, encoding="utf-8", errors="replace") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return None
+        config = {}
+        for line in lines:
+            key, sep, value = line.partition("=")
+            if sep:
+                config[key.strip().lower()] = value.strip()
+        return VenvInfo(path, cfg_mtime, config)
+
+
+class VenvIndex:
+    """
+    The virtual environments under the directories the terminal has been in.
+    The first scan of a root walks it (up to VENV_SCAN_DEPTH levels, skipping
+    VENV_SKIP_DIRS); later scans re-list only the directories whose mtime
+    changed. Lookups and completion only read the index.
+    """
+
+    def __init__(self, max_depth=VENV_SCAN_DEPTH, max_dirs=VENV_SCAN_LIMIT):
+        self.max_depth = max_depth
+        self.max_dirs = max_dirs
+        self.venvs = {}              # path -> VenvInfo
+        self._dirs = {}              # path -> (mtime, subdirectories, is venv)
+        self._lock = threading.Lock()
+        self._scan_lock = threading.Lock()
+        self._generation = 0         # bumped on every change, invalidates _ranked
+        self._ranked = None
+
+    def get(self, path):
+        """The VenvInfo of `path`, re-read only when its pyvenv.cfg changed."""
+        path = os.path.abspath(path)
+        with self._lock:
+            info = self.venvs.get(path)
+        try:
+            cfg_mtime = os.stat(os.path.join(path, "pyvenv.cfg")).st_mtime_ns
+        except OSError:
+            self._forget(path)
+            return None
+        if info is None or info.cfg_mtime != cfg_mtime:
+            fresh = VenvInfo.read(path)
+            if fresh is not None and info is not None:
+                fresh.uses, fresh.last_used = info.uses, info.last_used
+            info = fresh
+            if info is not None:
+                with self._lock:
+                    self.venvs[path] = info
+                    self._generation += 1
+        return info
+
+    def _forget(self, path):
+        with self._lock:
+            if self.venvs.pop(path, None) is not None:
+                self._generation += 1
+
+    def scan(self, root):
+        """Bring the index up to date under `root`."""
+        with self._scan_lock:
+            self._visit(os.path.abspath(root), 0, [self.max_dirs])
+
+    def scan_async(self, root):
+        threading.Thread(target=self.scan, args=(root,), daemon=True).start()
+
+    def _visit(self, path, depth, budget):
+        if budget[0] <= 0:
+            return
+        budget[0] -= 1
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            self._purge(path)
+            return
+        cached = self._dirs.get(path)
+        if cached is not None and cached[0] == mtime:
+            _, subdirs, is_venv = cached
+        else:
+            subdirs, is_venv = [], False
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        if entry.name == "pyvenv.cfg":
+                            is_venv = True
+                        elif entry.name not in VENV_SKIP_DIRS:
+                            try:
+                                if entry.is_dir(follow_symlinks=False):
+                                    subdirs.append(entry.path)
+                            except OSError:
+                                pass
+            except OSError:
+                pass
+            if cached is not None:
+                for gone in set(cached[1]) - set(subdirs):
+                    self._purge(gone)
+            self._dirs[path] = (mtime, subdirs, is_venv)
+        if is_venv:
+            # Nothing inside a venv is another venv worth offering
+            self.get(path)
+            return
+        self._forget(path)
+        if depth < self.max_depth:
+            for subdir in subdirs:
+                self._visit(subdir, depth + 1, budget)
+
+    def _purge(self, path):
+        """Forget `path` and everything indexed under it (it was deleted or renamed)."""
+        inside = path.rstrip(os.sep) + os.sep
+        for known in [d for d in self._dirs if d == path or d.startswith(inside)]:
+            del self._dirs[known]
+        with self._lock:
+            for known in [v for v in self.venvs if v == path or v.startswith(inside)]:
+                del self.venvs[known]
+                self._generation += 1
+
+    def used(self, info):
+        with self._lock:
+            info.uses += 1
+            info.last_used = time.time()
+            self._generation += 1
+
+    def ranked(self, cwd, partial="", limit=50):
+        """
+        Known venvs matching `partial` (a prefix of their path relative to `cwd`,
+        or of their name), most used first, then the ones nearest to `cwd`.
+        """
+        partial = partial.lower()
+        with self._lock:
+            cached = self._ranked
+            if cached is None or cached[0] != (cwd, self._generation):
+                cached = self._ranked = ((cwd, self._generation), self._rank_all(cwd))
+        return [(shown, info) for shown, keys, info in cached[1]
+                if not partial or any(key.startswith(partial) for key in keys)][:limit]
+
+    def _rank_all(self, cwd):
+        entries = []
+        for info in self.venvs.values():
+            try:
+                rel = os.path.relpath(info.path, cwd)
+            except ValueError:
+                rel = info.path   # another drive on Windows
+            shown = rel if not rel.startswith(os.pardir + os.sep + os.pardir) else info.path
+            rank = (-info.uses, -info.last_used, rel.startswith(os.pardir), rel.count(os.sep), shown)
+            entries.append((rank, shown, (shown.lower(), info.name.lower()), info))
+        entries.sort(key=lambda e: e[0])
+        return [(shown, keys, info) for _, shown, keys, info in entries]
+
+
+venv_index = VenvIndex()
+
+# One frame per activation: what to put back on deactivate
 _VENV_STACK = []
 
 def activate_venv(venv_path):
     """
     Activate a Python virtual environment inside this Python process.
     Updates PATH, VIRTUAL_ENV, and sys.path so subprocesses also use the venv's Python.
+    Only this venv's own entries are added and later removed, so switching does
+    not depend on the length of PATH or sys.path.
     """
     try:
         venv_path = os.path.abspath(venv_path)
-        if not os.path.isdir(venv_path) or not os.path.exists(os.path.join(venv_path, "pyvenv.cfg")):
+        info = venv_index.get(venv_path) if os.path.isdir(venv_path) else None
+        if info is None:
             print(f"Not a valid virtual environment: {venv_path}")
             return False
-
-        if "VIRTUAL_ENV" in os.environ and os.environ["VIRTUAL_ENV"]:
-            _VENV_STACK.append({
-                "VIRTUAL_ENV": os.environ["VIRTUAL_ENV"],
-                "PATH": os.environ["PATH"],
-                "sys.path": list(sys.path)
-            })
-            deactivate_venv(silent=True)
-
-        bin_folder = os.path.join(venv_path, "Scripts" if os.name == "nt" else "bin")
-        if not os.path.isdir(bin_folder):
+        if not os.path.isdir(info.bin_dir):
             print(f"No Scripts/bin folder in: {venv_path}")
             return False
 
+        outer = _VENV_STACK[-1] if _VENV_STACK and os.environ.get("VIRTUAL_ENV") == _VENV_STACK[-1]["info"].path else None
+        if outer is None and os.environ.get("VIRTUAL_ENV"):
+            # Activated before the terminal started: drop it the slow way once
+            deactivate_venv(silent=True)
+        frame = {
+            "info": info,
+            "prev_venv": os.environ.get("VIRTUAL_ENV"),
+            "prev_path": os.environ.get("PATH", ""),
+            # PATH and sys.path without any venv of ours
+            "base_path": outer["base_path"] if outer else os.environ.get("PATH", ""),
+            "base_len": outer["base_len"] if outer else len(sys.path),
+            "prev_entries": list(sys.path[outer["base_len"]:]) if outer else [],
+        }
+        del sys.path[frame["base_len"]:]
+        _VENV_STACK.append(frame)
+
         os.environ["VIRTUAL_ENV"] = venv_path
-        os.environ["PATH"] = bin_folder + os.pathsep + os.environ.get("PATH", "")
+        os.environ["PATH"] = info.path_prefix + frame["base_path"]
 
-        py_version = f"python{sys.version_info.major}.{sys.version_info.minor}"
-        site_packages = (
-            os.path.join(venv_path, "Lib", "site-packages")
-            if os.name == "nt"
-            else os.path.join(venv_path, "lib", py_version, "site-packages")
-        )
-        if os.path.exists(site_packages):
-            site.addsitedir(site_packages)
+        if info.site_packages is not None:
+            site.addsitedir(info.site_packages)
         else:
-            print(f"No site-packages found in: {site_packages}")
+            print(f"No site-packages found in: {venv_path} (Python {info.version or 'unknown'})")
+        venv_index.used(info)
 
         print(f"Activated virtual environment: {venv_path}")
         return True
@@ -131,6 +668,17 @@ def activate_venv(venv_path):
         print(f"Failed to activate venv: {e}")
         return False
 
+def _strip_venv(venv_path):
+    """Remove a venv we did not activate ourselves, by filtering PATH and sys.path."""
+    bin_folder = os.path.abspath(os.path.join(venv_path, "Scripts" if os.name == "nt" else "bin"))
+    os.environ["PATH"] = os.pathsep.join(
+        [p for p in os.environ["PATH"].split(os.pathsep) if os.path.abspath(p) != bin_folder]
+    )
+    info = venv_index.get(venv_path)
+    if info is not None and info.site_packages is not None:
+        sys.path[:] = [p for p in sys.path if not p.startswith(info.site_packages)]
+    os.environ.pop("VIRTUAL_ENV", None)
+
 def deactivate_venv(silent=False):
     """
     Deactivate the currently active virtual environment.
@@ -143,28 +691,22 @@ def deactivate_venv(silent=False):
             return False
 
         current_venv = os.environ["VIRTUAL_ENV"]
-        bin_folder = os.path.join(current_venv, "Scripts" if os.name == "nt" else "bin")
-        os.environ["PATH"] = os.pathsep.join(
-            [p for p in os.environ["PATH"].split(os.pathsep) if os.path.abspath(p) != os.path.abspath(bin_folder)]
-        )
+        if not _VENV_STACK or _VENV_STACK[-1]["info"].path != current_venv:
+            _strip_venv(current_venv)
+            if not silent:
+                print(f"Deactivated virtual environment: {current_venv}")
+            return True
 
-        py_version = f"python{sys.version_info.major}.{sys.version_info.minor}"
-        site_packages = (
-            os.path.join(current_venv, "Lib", "site-packages")
-            if os.name == "nt"
-            else os.path.join(current_venv, "lib", py_version, "site-packages")
-        )
-        sys.path[:] = [p for p in sys.path if not p.startswith(os.path.abspath(site_packages))]
-        os.environ.pop("VIRTUAL_ENV", None)
-
-        if _VENV_STACK:
-            prev_env = _VENV_STACK.pop()
-            os.environ["VIRTUAL_ENV"] = prev_env["VIRTUAL_ENV"]
-            os.environ["PATH"] = prev_env["PATH"]
-            sys.path[:] = prev_env["sys.path"]
+        frame = _VENV_STACK.pop()
+        os.environ["PATH"] = frame["prev_path"]
+        del sys.path[frame["base_len"]:]
+        sys.path.extend(frame["prev_entries"])
+        if frame["prev_venv"]:
+            os.environ["VIRTUAL_ENV"] = frame["prev_venv"]
             if not silent:
-                print(f"Restored previous virtual environment: {prev_env['VIRTUAL_ENV']}")
+                print(f"Restored previous virtual environment: {frame['prev_venv']}")
         else:
+            os.environ.pop("VIRTUAL_ENV", None)
             if not silent:
                 print(f"Deactivated virtual environment: {current_venv}")
 
@@ -174,29 +716,315 @@ def deactivate_venv(silent=False):
         print(f"Failed to deactivate venv: {e}")
         return False
 
-def askQuestions(Query):
+GEMINI_MODEL = "gemini-2.0-flash"
+
+ASK_PROMPT = "you are a cli expert this is query {query} give me only command dont give me anything so i can parse this thing where i want which i can type and execute it"
+
+EXECUTE_PROMPT = (
+    "You are a command line expert. Convert the following natural language request "
+    "into a Python list of shell commands. and give the commands for windows and which can be used in command prompt. Output ONLY the list. No explanation. "
+    "For example: ['dir', 'cd ..', 'pip list'].\n\n"
+    "Request: {query}"
+)
+
+INLINE_HOME = os.getenv('INLINE_HOME', os.path.join(os.path.expanduser("~"), ".inline_terminal"))
+
+#One Gemini client for the whole session (keeps the HTTP connection pool warm)
+_gemini_client = None
+_gemini_client_lock = threading.Lock()
+
+def get_gemini_client():
+    global _gemini_client
+    if _gemini_client is None:
+        with _gemini_client_lock:
+            if _gemini_client is None:
+                from google import genai
+                from dotenv import load_dotenv
+                load_dotenv()
+                _gemini_client = genai.Client(api_key=os.getenv('GEMINI_API_KEY'))
+    return _gemini_client
+
+def set_gemini_client(client):
+    """Swap the shared client, e.g. for a stub with the same `models` interface."""
+    global _gemini_client
+    with _gemini_client_lock:
+        _gemini_client = client
+
+def _is_retryable(error):
+    """Client errors (bad key, bad request...) will not go away by retrying."""
+    code = getattr(error, "code", None)
+    if isinstance(code, int) and 400 <= code < 500 and code not in (408, 429):
+        return False
+    return True
+
+class RateLimiter:
+    """
+    Token bucket shared by every Gemini request: at most `rate` requests per
+    second on average, with bursts of up to `burst`. A rate of 0 means no limit.
+    """
+
+    def __init__(self, rate=0.0, burst=1):
+        self._lock = threading.Lock()
+        self.configure(rate, burst)
+
+    def configure(self, rate, burst=None):
+        with self._lock:
+            self.rate = rate
+            self.burst = max(1, burst if burst is not None else getattr(self, "burst", 1))
+            self._tokens = float(self.burst)
+            self._stamp = time.monotonic()
+
+    def wait(self):
+        while True:
+            with self._lock:
+                if self.rate <= 0:
+                    return
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+
+
+gemini_rate_limit = RateLimiter(float(os.getenv('INLINE_GEMINI_RATE', '0')),
+                                int(os.getenv('INLINE_GEMINI_BURST', '1')))
+
+def with_backoff(fn, attempts=3, base_delay=0.5, max_delay=4.0, should_retry=_is_retryable):
+    """
+    Call fn(), retrying failures with bounded exponential backoff and jitter.
+    The last error is re-raised once the attempts are used up.
+    """
+    delay = base_delay
+    for attempt in range(attempts):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == attempts - 1 or not should_retry(e):
+                raise
+            time.sleep(random.uniform(delay / 2, delay))
+            delay = min(delay * 2, max_delay)
+
+#Implementing the on-disk cache for inline --ask / --execute answers
+class ResponseCache:
+    """
+    Persistent LRU cache of Gemini answers, stored as one JSON file.
+    Entries expire after `ttl` seconds, and the oldest ones are evicted once
+    there are more than `max_entries` of them or they take more than `max_bytes`.
+    """
+
+    def __init__(self, path, max_entries=500, ttl=7 * 24 * 3600, max_bytes=2 * 1024 * 1024):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = None
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(kind, query, template):
+        # File names and flags are case-sensitive, so only whitespace is collapsed
+        normalized = " ".join(query.split())
+        shell = os.environ.get("SHELL") or os.environ.get("COMSPEC", "")
+        raw = json.dumps([kind, normalized, template, GEMINI_MODEL, platform.system(), shell])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        self._entries = OrderedDict()
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for key, entry in json.load(f).get("entries", []):
+                    self._entries[key] = entry
+                    self._bytes += entry["size"]
+        except (OSError, ValueError, KeyError, TypeError):
+            self._entries.clear()
+            self._bytes = 0
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"entries": list(self._entries.items())}, f)
+        os.replace(tmp_path, self.path)
+
+    def get(self, key):
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry["ts"] > self.ttl:
+                self._bytes -= self._entries.pop(key)["size"]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["value"]
+
+    def put(self, key, value):
+        with self._lock:
+            self._load()
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)["size"]
+            size = len(json.dumps(value))
+            self._entries[key] = {"value": value, "ts": time.time(), "size": size}
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._bytes -= self._entries.popitem(last=False)[1]["size"]
+            try:
+                self._save()
+            except OSError as e:
+                print(f"Could not write the response cache: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries = OrderedDict()
+            self._bytes = 0
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            self._load()
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+response_cache = ResponseCache(
+    os.path.join(INLINE_HOME, "response_cache.json"),
+    max_entries=int(os.getenv('INLINE_CACHE_MAX_ENTRIES', '500')),
+    ttl=float(os.getenv('INLINE_CACHE_TTL', str(7 * 24 * 3600))),
+    max_bytes=int(os.getenv('INLINE_CACHE_MAX_BYTES', str(2 * 1024 * 1024)))
+)
+
+# The Ctrl+C event of the foreground work running in this thread (see foreground)
+_foreground = threading.local()
+
+def foreground_cancelled():
+    """Whether Ctrl+C has abandoned the foreground work this thread is doing; it should stop quietly."""
+    cancelled = getattr(_foreground, "cancelled", None)
+    return cancelled is not None and cancelled.is_set()
+
+
+class ForegroundCancelled(Exception):
+    pass
+
+
+@traced("gemini.ask")
+def askQuestions(Query, refresh=False, echo=True):
+    """
+    Answer an inline --ask query, streaming it to the terminal unless `echo` is
+    False. Returns the answer text, or None when the request failed.
+    """
+    content = ASK_PROMPT.format(query=Query)
+    cache_key = ResponseCache.make_key("ask", Query, ASK_PROMPT)
+    if not refresh:
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            if echo:
+                print(cached)
+            return cached
+
+    printed = False
+    answer = []
+
+    def stream_answer():
+        nonlocal printed
+        answer.clear()
+        gemini_rate_limit.wait()
+        for chunk in get_gemini_client().models.generate_content_stream(model=GEMINI_MODEL, contents=content):
+            if echo and foreground_cancelled():
+                raise ForegroundCancelled()
+            if chunk.text:
+                answer.append(chunk.text)
+                if echo:
+                    print(chunk.text, end="", flush=True)
+                    printed = True
+
     try:
-        client = genai.Client(api_key=gemini_api_key)
-        response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=f"you are a cli expert this is query {Query} give me only command dont give me anything so i can parse this thing where i want which i can type and execute it"
-        )
-        time.sleep(3)
-        print(response.text)
-        return
+        # Once tokens are on screen a retry would print the answer twice
+        with_backoff(stream_answer, should_retry=lambda e: not printed and _is_retryable(e))
+        if echo:
+            print()
+        if answer:
+            response_cache.put(cache_key, "".join(answer))
+        return "".join(answer)
+    except ForegroundCancelled:
+        if printed:
+            print()
+        return None
     except:
-        print("Something Error has occurred!!!!, Please check the network connection")
-        return
+        if printed:
+            print()
+        if echo:
+            print("Something Error has occurred!!!!, Please check the network connection")
+        return None
+
+def parse_command_list(response_text):
+    """
+    Pull a Python list of command strings out of a model answer: the fenced
+    code blocks first, then the whole answer, then the first [...] in it.
+    Returns None when nothing parses.
+    """
+    response_text = (response_text or "").strip()
+    candidates = [block.strip() for block in re.findall(r"```(?:\w+)?\s*([\s\S]+?)```", response_text)]
+    candidates.append(response_text)
+    candidates.extend(re.findall(r"\[[\s\S]*?\]", response_text))
+    for candidate in candidates:
+        try:
+            parsed = ast.literal_eval(candidate)
+        except Exception:
+            continue
+        if isinstance(parsed, list) and parsed and all(isinstance(cmd, str) for cmd in parsed):
+            return [cmd.strip() for cmd in parsed if cmd.strip()]
+    return None
+
+def parse_leading_list(partial_text):
+    """
+    Parse a list at the very start of a (possibly still streaming) answer,
+    so the commands can be shown before the rest of the answer arrives.
+    """
+    text = re.sub(r"^\s*```\w*\s*", "", partial_text or "")
+    if not text.startswith("["):
+        return None
+    for m in re.finditer(r"\]", text):
+        try:
+            parsed = ast.literal_eval(text[:m.end()])
+        except Exception:
+            continue
+        if isinstance(parsed, list) and parsed and all(isinstance(cmd, str) for cmd in parsed):
+            return [cmd.strip() for cmd in parsed if cmd.strip()]
+        return None
+    return None
+
+@traced("gemini.execute")
+def executeQuery(Query, refresh=False):
+    """
+    Returns the parsed command list, [] when the answer could not be parsed,
+    or None when the request itself failed (after retries).
+    """
+    cache_key = ResponseCache.make_key("execute", Query, EXECUTE_PROMPT)
+    if not refresh:
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            print(cached)
+            return cached
 
-def executeQuery(Query):
     try:
-        client = genai.Client(api_key=gemini_api_key)
-        content = (
-            "You are a command line expert. Convert the following natural language request "
-            "into a Python list of shell commands. and give the commands for windows and which can be used in command prompt. Output ONLY the list. No explanation. "
-            "For example: ['dir', 'cd ..', 'pip list'].\n\n"
-            f"Request: {Query}"
-        )
+        content = EXECUTE_PROMPT.format(query=Query)
         # content = (
         #     "You are a powerful agentic AI coding assistant, operating inside a custom inline terminal. "
         #     "Follow these rules carefully:\n"
@@ -216,40 +1044,325 @@ def executeQuery(Query):
         #Modified content --3rd
         # content = (f"you are a cli expert this is query {Query} give me only command dont give me anything so i can parse this thing where i want which i can type and execute it")
 
-        response = client.models.generate_content(
-            model="gemini-2.0-flash", contents=content
-        )
-        time.sleep(3)
-        response_text = response.text.strip()
-        code_blocks = re.findall(r"```(?:\w+)?\s*([\s\S]+?)```", response_text)
-        for block in code_blocks:
-            block = block.strip()
-            try:
-                execution_cmd_list = ast.literal_eval(block)
-                if isinstance(execution_cmd_list, list):
-                    print(execution_cmd_list)
-                    return execution_cmd_list
-            except Exception:
-                continue
-        print("Something Error has occurred!!!!, Please check the network connection, we are Trying Again")
+        def fetch():
+            # Stop reading as soon as the answer opens with a complete list
+            answer = []
+            gemini_rate_limit.wait()
+            for chunk in get_gemini_client().models.generate_content_stream(model=GEMINI_MODEL, contents=content):
+                if chunk.text:
+                    answer.append(chunk.text)
+                    if "]" in chunk.text:
+                        early = parse_leading_list("".join(answer))
+                        if early:
+                            return early
+            return parse_command_list("".join(answer))
+
+        execution_cmd_list = with_backoff(fetch)
+        if execution_cmd_list:
+            print(execution_cmd_list)
+            response_cache.put(cache_key, execution_cmd_list)
+            return execution_cmd_list
+        print("Could not read the command list from the answer, we are Trying Again")
         return []
     except:
-        print("Something Error has occurred!!!!, Please check the network connection, we are Trying Again")
-        return []
+        print("Something Error has occurred!!!!, Please check the network connection")
+        return None
+
+def split_refresh_flag(Query):
+    """Strip a leading --refresh from an inline query, returning (query, refresh)."""
+    stripped = Query.strip()
+    if stripped == "--refresh" or stripped.startswith("--refresh "):
+        return stripped[len("--refresh"):], True
+    return Query, False
+
+#Implementing the history compaction for suggest_commands
+PREDICTION_HISTORY_TOKENS = int(os.getenv('INLINE_PREDICTION_HISTORY_TOKENS', '800'))
+BYTES_PER_TOKEN = 4   # rough estimate, good enough for a budget
+
+SECRET_PATTERNS = [
+    # --password=x, --token x, -api-key x ...
+    re.compile(r"(?i)(--?[\w-]*(?:password|passwd|token|secret|api[-_]?key|access[-_]?key|auth)[\w-]*[= ]\s*)(\S+)"),
+    # PASSWORD=x, GITHUB_TOKEN=x, AWS_SECRET_ACCESS_KEY=x ...
+    re.compile(r"(?i)(\b\w*(?:password|passwd|token|secret|api_?key|access_?key)\w*=)(\S+)"),
+    re.compile(r"(?i)(authorization:\s*(?:bearer|basic|token)\s+)(\S+)"),
+    # user:password@host in URLs
+    re.compile(r"(://[^/\s:@]+:)([^@\s/]+)(?=@)"),
+    # mysql -pPASSWORD
+    re.compile(r"(?i)(\b(?:mysql|mysqldump|mariadb)\b.*?\s-p)(\S+)"),
+    # well-known token shapes (AWS access keys, GitHub and Slack tokens)
+    re.compile(r"()(\bAKIA[0-9A-Z]{16}\b|\bgh[pousr]_[A-Za-z0-9]{20,}\b|\bxox[abprs]-[A-Za-z0-9-]{10,})"),
+]
+
+def redact_secrets(cmd):
+    for pattern in SECRET_PATTERNS:
+        cmd = pattern.sub(lambda m: m.group(1) + "***", cmd)
+    return cmd
+
+compaction_stats = {"requests": 0, "bytes_before": 0, "bytes_after": 0, "last_before": 0, "last_after": 0}
+
+def compact_history(cmd_history, budget_tokens=PREDICTION_HISTORY_TOKENS, recent=20, frequent=10):
+    """
+    Shrink a command history for the prediction prompt: redact secret-looking
+    arguments, drop repeats, keep the `recent` latest distinct commands plus the
+    `frequent` most used older ones (listed first, so the latest come last), then
+    drop from the front until the list fits `budget_tokens`.
+    """
+    # Select on the raw commands first so only the survivors pay for redaction
+    counts = Counter(cmd_history)
+    latest = []
+    seen = set()
+    for cmd in reversed(cmd_history):
+        if cmd not in seen:
+            seen.add(cmd)
+            latest.append(cmd)
+            if len(latest) == recent:
+                break
+    latest.reverse()
+
+    older = [cmd for cmd, _ in counts.most_common(frequent + recent) if cmd not in seen][:frequent]
+    older.reverse()
+
+    compacted = []
+    for cmd in older + latest:
+        cmd = redact_secrets(cmd)
+        # commands that differed only in a secret collapse into one
+        if cmd in compacted:
+            compacted.remove(cmd)
+        compacted.append(cmd)
 
+    budget = budget_tokens * BYTES_PER_TOKEN
+    size = len(repr(compacted))
+    while compacted and size > budget:
+        size -= len(repr(compacted.pop(0))) + 2
+    size = len(repr(compacted))
+
+    before = len(repr(list(cmd_history)))
+    compaction_stats["requests"] += 1
+    compaction_stats["bytes_before"] += before
+    compaction_stats["bytes_after"] += size
+    compaction_stats["last_before"] = before
+    compaction_stats["last_after"] = size
+    return compacted
+
+@traced("gemini.suggest")
 def suggest_commands(cmd_history):
     try:
-        client = genai.Client(api_key=gemini_api_key)
-        response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=f"you are a cli expert this is history of the cmd used earlier can you predict the next 5 cmds and give me the list of it only list dont give me any thing so i can parse these things cmdhistory={cmd_history}"
+        compacted = compact_history(cmd_history)
+        gemini_rate_limit.wait()
+        response = get_gemini_client().models.generate_content(
+            model=GEMINI_MODEL,
+            contents=f"you are a cli expert this is history of the cmd used earlier can you predict the next 5 cmds and give me the list of it only list dont give me any thing so i can parse these things cmdhistory={compacted}"
         )
-        response_list = ast.literal_eval(response.text)
-        return response_list
+        return parse_command_list(response.text) or []
     except:
         return []
 
+#Implementing the cached directory listings for path completion
+PATH_COMPLETION_LIMIT = int(os.getenv('INLINE_PATH_COMPLETION_LIMIT', '200'))
+
+class DirectoryIndex:
+    """
+    Sorted, case-folded directory listings cached per directory.
+    A listing is re-read (with os.scandir, whose d_type info avoids a stat per
+    entry) only when the directory's mtime changes; prefix lookups bisect into it.
+    """
+
+    def __init__(self, max_dirs=64):
+        self.max_dirs = max_dirs
+        self._listings = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _scan(self, path):
+        entries = []
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                entries.append((entry.name.lower(), entry.name, is_dir))
+        entries.sort()
+        return [e[0] for e in entries], entries
+
+    def listing(self, path):
+        mtime = os.stat(path).st_mtime_ns
+        with self._lock:
+            cached = self._listings.get(path)
+            if cached is not None and cached[0] == mtime:
+                self._listings.move_to_end(path)
+                return cached
+        keys, entries = self._scan(path)
+        with self._lock:
+            self._listings[path] = (mtime, keys, entries)
+            self._listings.move_to_end(path)
+            while len(self._listings) > self.max_dirs:
+                self._listings.popitem(last=False)
+        return mtime, keys, entries
+
+    def complete(self, path, prefix, limit=PATH_COMPLETION_LIMIT):
+        """Return up to `limit` (name, is_dir) pairs whose name starts with `prefix`, ignoring case."""
+        _, keys, entries = self.listing(path)
+        prefix = prefix.lower()
+        start = bisect.bisect_left(keys, prefix)
+        matches = []
+        for key, name, is_dir in entries[start:start + limit]:
+            if not key.startswith(prefix):
+                break
+            matches.append((name, is_dir))
+        return matches
+
+
+directory_index = DirectoryIndex()
+
+#Implementing the index of executables on PATH (first-word completion)
+class ExecutableIndex:
+    """
+    Names of the executables in the PATH directories, sorted and case-folded.
+    Each directory's listing is cached and re-read only when its mtime changes;
+    a change of PATH itself (e.g. activate) re-lists only the new directories.
+    Prefix lookups bisect into the names. Fuzzy lookups run one regex over the
+    names joined by newlines, restricted to the names that contain the query's
+    rarest character (or to the previous query's matches while it is being
+    typed). Rebuilds run in a background thread.
+    """
+
+    def __init__(self):
+        self._listings = {}      # directory -> (mtime, names)
+        self._path = None        # the PATH the current names were built from
+        self._names = []
+        self._keys = []
+        self._by_char = {}       # character -> "\n"-joined folded names containing it
+        self._originals = {}     # folded name -> names (mpicc and mpiCC fold alike)
+        self._last_fuzzy = ("", "")
+        self._lock = threading.Lock()
+        self._busy = False
+        self._again = False
+
+    @staticmethod
+    def _list(directory):
+        names = []
+        if os.name == "nt":
+            extensions = tuple(ext.lower() for ext in os.environ.get("PATHEXT", ".EXE;.BAT;.CMD;.COM").split(";") if ext)
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    if os.name == "nt":
+                        if entry.name.lower().endswith(extensions) and entry.is_file():
+                            names.append(entry.name)
+                    elif entry.is_file() and entry.stat().st_mode & 0o111:
+                        names.append(entry.name)
+                except OSError:
+                    pass
+        return names
+
+    def refresh(self):
+        """Bring the names up to date with PATH and the directories in it."""
+        path = os.environ.get("PATH", "")
+        directories = list(dict.fromkeys(d for d in path.split(os.pathsep) if d))
+        changed = path != self._path
+        for directory in directories:
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue
+            cached = self._listings.get(directory)
+            if cached is None or cached[0] != mtime:
+                try:
+                    self._listings[directory] = (mtime, self._list(directory))
+                except OSError:
+                    continue
+                changed = True
+        if not changed:
+            return
+        unique = set()
+        for directory in directories:
+            if directory in self._listings:
+                unique.update(self._listings[directory][1])
+        names = sorted(unique, key=lambda name: (name.lower(), name))
+        keys = [name.lower() for name in names]
+        originals = {}
+        for key, name in zip(keys, names):
+            originals.setdefault(key, []).append(name)
+        containing = {}
+        for key in originals:
+            for c in set(key):
+                containing.setdefault(c, []).append(key)
+        by_char = {c: "\n" + "\n".join(group) for c, group in containing.items()}
+        with self._lock:
+            self._names = names
+            self._keys = keys
+            self._by_char = by_char
+            self._originals = originals
+            self._last_fuzzy = ("", "")
+            self._path = path
+
+    def refresh_async(self):
+        """Refresh in the background; calls made while one runs are folded into one more run."""
+        with self._lock:
+            if self._busy:
+                self._again = True
+                return
+            self._busy = True
+
+        def run():
+            while True:
+                try:
+                    self.refresh()
+                except Exception:
+                    pass
+                with self._lock:
+                    if not self._again:
+                        self._busy = False
+                        return
+                    self._again = False
+        threading.Thread(target=run, daemon=True).start()
+
+    def _check_path(self):
+        if os.environ.get("PATH", "") != self._path:
+            self.refresh_async()
+
+    def prefix(self, prefix, limit=PATH_COMPLETION_LIMIT):
+        """Executables whose name starts with `prefix`, ignoring case, in name order."""
+        self._check_path()
+        with self._lock:
+            names, keys = self._names, self._keys
+        prefix = prefix.lower()
+        start = bisect.bisect_left(keys, prefix)
+        matches = []
+        for key, name in zip(keys[start:start + limit], names[start:start + limit]):
+            if not key.startswith(prefix):
+                break
+            matches.append(name)
+        return matches
+
+    def fuzzy(self, text, limit=PATH_COMPLETION_LIMIT):
+        """Executables containing the characters of `text` in order, shortest first."""
+        self._check_path()
+        text = text.lower()
+        with self._lock:
+            by_char, originals, last = self._by_char, self._originals, self._last_fuzzy
+        if not text:
+            return []
+        groups = [by_char.get(c) for c in set(text)]
+        if None in groups:
+            return []
+        haystack = min(groups, key=len)
+        if last[0] and text.startswith(last[0]) and len(last[1]) < len(haystack):
+            haystack = last[1]
+        pattern = "".join(f"[^\\n{re.escape(c)}]*{re.escape(c)}" for c in text)
+        # A leading literal \n lets re jump from line to line instead of trying every position
+        matches = re.findall(f"\\n({pattern}[^\\n]*)", haystack)
+        with self._lock:
+            if self._by_char is by_char:
+                self._last_fuzzy = (text, "\n" + "\n".join(matches))
+        matches.sort(key=lambda key: (not key.startswith(text[0]), len(key), key))
+        return [name for key in matches[:limit] for name in originals[key]][:limit]
+
+
+executable_index = ExecutableIndex()
+
 class PathCompleter(Completer):
+    @traced_generator("complete.path")
     def get_completions(self, document, complete_event):
         text = document.text_before_cursor.strip()
         current_dir = os.getcwd()
@@ -264,263 +1377,2062 @@ class PathCompleter(Completer):
             base_dir = os.path.dirname(base_path) if partial else current_dir
             partial_name = os.path.basename(partial).lower()
 
-            for entry in pathlib.Path(base_dir).iterdir():
-                name = entry.name
-                if name.lower().startswith(partial_name):
-                    display = name + (os.sep if entry.is_dir() else "")
-                    yield Completion(name, start_position=-len(partial), display=display)
+            for name, is_dir in directory_index.complete(base_dir, partial_name):
+                display = name + (os.sep if is_dir else "")
+                yield Completion(name, start_position=-len(partial), display=display)
         except Exception:
             pass
 
+class VenvCompleter(Completer):
+    """`activate` completion: the indexed venvs first (ranked), then plain directories."""
+
+    def __init__(self, index, path_completer):
+        self.index = index
+        self.path_completer = path_completer
+
+    @traced_generator("complete.venv")
+    def get_completions(self, document, complete_event):
+        text = document.text_before_cursor
+        words = text.split()
+        partial = words[-1] if len(words) > 1 and not text.endswith(" ") else ""
+        offered = set()
+        for shown, info in self.index.ranked(os.getcwd(), partial, limit=PATH_COMPLETION_LIMIT):
+            offered.add(shown)
+            yield Completion(shown, start_position=-len(partial), display=shown,
+                             display_meta=f"venv, Python {info.version or '?'}")
+        for completion in self.path_completer.get_completions(document, complete_event):
+            if completion.text not in offered:
+                yield completion
+
 class CompositeCompleter(Completer):
-    def __init__(self, command_completer, path_completer):
+    def __init__(self, command_completer, path_completer, venv_completer=None, executable_index=None):
         self.command_completer = command_completer
         self.path_completer = path_completer
+        self.venv_completer = venv_completer
+        self.executable_index = executable_index
 
     def get_completions(self, document, complete_event):
         text = document.text_before_cursor.strip()
         words = text.split()
 
-        if words and words[0] in ['cd', 'activate']:
+        if words and words[0] == 'activate' and self.venv_completer is not None:
+            yield from self.venv_completer.get_completions(document, complete_event)
+        elif words and words[0] in ['cd', 'activate']:
             yield from self.path_completer.get_completions(document, complete_event)
         else:
-            yield from self.command_completer.get_completions(document, complete_event)
+            offered = set()
+            for completion in self.command_completer.get_completions(document, complete_event):
+                offered.add(completion.text)
+                yield completion
+            first = document.text_before_cursor.lstrip()
+            if first and not any(c.isspace() for c in first) and self.executable_index is not None:
+                yield from self._executables(first, offered)
 
-suggestion_list = ['exit', 'help', 'cd', 'inline --help', 'inline --ask', 'inline --execute', 'activate', 'deactivate', 'inline --contact', 'mkdir']
-suggestion_set = set(suggestion_list)
-command_completer = WordCompleter(suggestion_list, ignore_case=True)
-path_completer = PathCompleter()
-completer = CompositeCompleter(command_completer, path_completer)
-cmd_history = []
-first_path_flag = False
-bindings = KeyBindings()
-history = InMemoryHistory()
-lock = threading.Lock()
+    @traced_generator("complete.executable")
+    def _executables(self, first, offered):
+        """First word: executables on PATH after the history, prefix matches before fuzzy ones."""
+        for name in self.executable_index.prefix(first, limit=50):
+            if name in offered:
+                continue
+            offered.add(name)
+            yield Completion(name, start_position=-len(first), display_meta="executable")
+        if len(offered) < 10 and len(first) > 1:
+            for name in self.executable_index.fuzzy(first, limit=20):
+                if name not in offered:
+                    offered.add(name)
+                    yield Completion(name, start_position=-len(first), display_meta="executable")
 
-class AutoSuggestCmd(AutoSuggest):
-    def get_suggestion(self, buffer, document):
-        text = document.text.strip()
-        if text is None:
-            return None
-        for cmd in suggestion_list:
-            if cmd.startswith(text) and cmd != text:
-                return Suggestion(cmd[len(text):])
-        return None
+#Implementing the trie-backed suggestion index
+class _TrieNode:
+    __slots__ = ("children", "commands", "top")
 
-def command_prediction_async():
-    with lock:
-        predicted_cmds = suggest_commands(cmd_history)
-        for cmd in predicted_cmds:
-            if cmd not in suggestion_set:
-                suggestion_set.add(cmd)
-                suggestion_list.append(cmd)
-        global command_completer, completer
-        command_completer = WordCompleter(suggestion_list, ignore_case=True)
-        completer = CompositeCompleter(command_completer, path_completer)
+    def __init__(self):
+        self.children = {}
+        self.commands = []   # commands whose case-folded text ends at this node
+        self.top = []        # best-ranked commands in this subtree, highest first
 
-@bindings.add('c-t')
-def _(event):
-    threading.Thread(target=command_prediction_async, daemon=True).start()
 
-#Implementing the Docker for the secure terminal
-def run_in_docker(cmd, timeout=5):
-    docker_cmd = [
-        "docker", "run", "--rm",
-        "--network", "none",     # no internet
-        "--memory", "128m",      # RAM limit
-        "--cpus", "0.5",         # CPU limit
-        "--pids-limit", "50",    # limit processes (stops fork bombs)
-        "ubuntu", "bash", "-c", cmd
-    ]
-    try:
-        result = subprocess.run(docker_cmd, capture_output=True, text=True, timeout=timeout)
-        return result.stdout if result.stdout else result.stderr
-    except subprocess.TimeoutExpired:
-        return "[!] Command killed (timeout — harmful or infinite loop)."
+class SuggestionIndex:
+    """
+    Prefix trie over case-folded commands, ranked by frecency.
 
+    Every use of a command adds exp(decay * t) to its weight (kept as a log), so
+    frequent and recent commands rank first while others keep their relative
+    order. That lets each node keep its own top-k list, updated only along the
+    path of the command that was used: a lookup is O(len(prefix) + k) and the
+    index is never rebuilt. Beyond `max_entries` the lowest-ranked, non-pinned
+    commands are dropped.
+    Predicted next commands live in a separate, transient tier: they are offered
+    ahead of the trie's matches but never count as uses.
+    """
 
+    def __init__(self, max_entries=5000, top_k=20, half_life=200, max_predicted=10):
+        self.max_entries = max_entries
+        self.top_k = top_k
+        self._decay = math.log(2) / half_life
+        self._root = _TrieNode()
+        self._scores = {}
+        self._pinned = set()
+        self._predicted = []
+        self.max_predicted = max_predicted
+        self._seq = 0
+        self._lock = threading.Lock()
 
+    def __len__(self):
+        return len(self._scores)
 
+    def __contains__(self, cmd):
+        return cmd in self._scores
 
-# Main loop
-while True:
+    def _path(self, cmd, create=False):
+        nodes = [self._root]
+        node = self._root
+        for ch in cmd.lower():
+            child = node.children.get(ch)
+            if child is None:
+                if not create:
+                    return None
+                child = node.children[ch] = _TrieNode()
+            node = child
+            nodes.append(node)
+        return nodes
+
+    def add(self, cmd, pinned=False):
+        """Record a use of `cmd`."""
+        cmd = cmd.strip()
+        if not cmd:
+            return
+        with self._lock:
+            self._seq += 1
+            bump = self._seq * self._decay
+            old = self._scores.get(cmd)
+            score = bump if old is None else max(old, bump) + math.log1p(math.exp(-abs(old - bump)))
+            self._scores[cmd] = score
+            if pinned:
+                self._pinned.add(cmd)
+
+            nodes = self._path(cmd, create=True)
+            if old is None:
+                nodes[-1].commands.append(cmd)
+            for node in nodes:
+                top = node.top
+                if cmd in top:
+                    top.remove(cmd)
+                pos = 0
+                while pos < len(top) and self._scores[top[pos]] >= score:
+                    pos += 1
+                if pos < self.top_k:
+                    top.insert(pos, cmd)
+                    del top[self.top_k:]
+
+            if len(self._scores) > self.max_entries:
+                self._prune()
+
+    def _prune(self):
+        # Drop a little more than needed so pruning stays rare
+        target = max(int(self.max_entries * 0.9), len(self._pinned))
+        candidates = sorted((c for c in self._scores if c not in self._pinned), key=self._scores.get)
+        for cmd in candidates[:len(self._scores) - target]:
+            self._remove(cmd)
+
+    def _remove(self, cmd):
+        nodes = self._path(cmd)
+        del self._scores[cmd]
+        nodes[-1].commands.remove(cmd)
+        key = cmd.lower()
+        # Rebuild top lists bottom-up from the children's lists, and drop empty nodes
+        for depth in range(len(nodes) - 1, -1, -1):
+            node = nodes[depth]
+            if depth < len(nodes) - 1:
+                child = nodes[depth + 1]
+                if not child.children and not child.commands:
+                    del node.children[key[depth]]
+            if cmd in node.top or len(node.top) < self.top_k:
+                candidates = set(node.commands)
+                for child in node.children.values():
+                    candidates.update(child.top)
+                node.top = sorted(candidates, key=self._scores.get, reverse=True)[:self.top_k]
+
+    def predict(self, cmds):
+        """Offer `cmds` (best first) as likely next commands, ahead of earlier predictions."""
+        fresh = [cmd.strip() for cmd in cmds if isinstance(cmd, str) and cmd.strip()]
+        with self._lock:
+            merged = fresh + [cmd for cmd in self._predicted if cmd not in fresh]
+            self._predicted = list(dict.fromkeys(merged))[:self.max_predicted]
+
+    def suggestions(self, prefix, limit=None):
+        """Predicted, then best-ranked commands starting with `prefix` (ignoring case)."""
+        limit = limit or self.top_k
+        key = prefix.lower()
+        with self._lock:
+            predicted = [cmd for cmd in self._predicted if cmd.lower().startswith(key)]
+            nodes = self._path(prefix)
+            if nodes is None:
+                return predicted[:limit]
+            if not predicted:
+                return nodes[-1].top[:limit]
+            return (predicted + [cmd for cmd in nodes[-1].top if cmd not in predicted])[:limit]
+
+
+class SuggestionCompleter(Completer):
+    """Tab completion of whole command lines from the suggestion index."""
+
+    def __init__(self, index):
+        self.index = index
+
+    @traced_generator("complete.command")
+    def get_completions(self, document, complete_event):
+        text = document.text_before_cursor.lstrip()
+        for cmd in self.index.suggestions(text):
+            yield Completion(cmd, start_position=-len(text))
+
+
+suggestion_index = SuggestionIndex(max_entries=int(os.getenv('INLINE_SUGGESTION_LIMIT', '5000')))
+for builtin_cmd in ['exit', 'help', 'cd', 'inline --help', 'inline --ask', 'inline --execute', 'activate', 'deactivate', 'inline --contact', 'mkdir']:
+    suggestion_index.add(builtin_cmd, pinned=True)
+path_completer = PathCompleter()
+completer = CompositeCompleter(SuggestionCompleter(suggestion_index), path_completer,
+                               VenvCompleter(venv_index, path_completer), executable_index)
+
+#Implementing the persistent command history
+HISTORY_HALF_LIFE = 3 * 24 * 3600   # seconds for a use to count half as much for frecency
+
+def _logaddexp(a, b):
+    if a is None:
+        return b
+    return max(a, b) + math.log1p(math.exp(-abs(a - b)))
+
+class HistoryStore:
+    """
+    Append-only command history in SQLite (WAL mode).
+
+    Every run is a row in `history` (command, cwd, venv, exit code, duration).
+    `commands` keeps one row per distinct command with its use count and a
+    frecency score (log of the sum of exp(decay * timestamp) over its uses), and
+    is what prefix, substring and frecency lookups read. Writes are queued and
+    applied by a background thread so the prompt never waits on the disk.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS history (
+            id INTEGER PRIMARY KEY,
+            command TEXT NOT NULL,
+            cwd TEXT,
+            venv TEXT,
+            exit_code INTEGER,
+            duration REAL,
+            ts REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS commands (
+            command TEXT PRIMARY KEY,
+            uses INTEGER NOT NULL,
+            last_ts REAL NOT NULL,
+            frecency REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS commands_frecency ON commands(frecency);
+    """
+
+    # Trigram FTS makes substring search indexed; older SQLite builds fall back to LIKE
+    FTS_SCHEMA = """
+        CREATE VIRTUAL TABLE IF NOT EXISTS commands_fts USING fts5(command, content='commands', tokenize='trigram');
+        CREATE TRIGGER IF NOT EXISTS commands_fts_insert AFTER INSERT ON commands BEGIN
+            INSERT INTO commands_fts(rowid, command) VALUES (new.rowid, new.command);
+        END;
+    """
+
+    def __init__(self, path, half_life=HISTORY_HALF_LIFE):
+        self.path = path
+        self._decay = math.log(2) / half_life
+        self._queue = queue.Queue()
+        self._writer = None
+        self._local = threading.local()
+        self._has_fts = False
+        self._ready = threading.Event()
+        self._failed = False
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.create_function("logaddexp", 2, _logaddexp, deterministic=True)
+        return conn
+
+    def _setup(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = self._connect()
+        with conn:
+            conn.executescript(self.SCHEMA)
+        try:
+            with conn:
+                conn.executescript(self.FTS_SCHEMA)
+            self._has_fts = True
+        except sqlite3.OperationalError:
+            self._has_fts = False
+        return conn
+
+    def _reader(self):
+        """Per-thread read connection (sqlite3 connections are not shared across threads)."""
+        self.start()
+        self._ready.wait()
+        if self._failed:
+            return None
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def start(self):
+        with self._lock:
+            if self._writer is not None:
+                return
+            self._writer = threading.Thread(target=self._write_loop, daemon=True)
+            self._writer.start()
+        atexit.register(self.close)
+
+    def _write_loop(self):
+        try:
+            conn = self._setup()
+        except (OSError, sqlite3.Error) as e:
+            print(f"Command history will not be saved: {e}")
+            self._failed = True
+            self._ready.set()
+            return
+        self._ready.set()
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            # Whatever else is already queued goes into the same transaction
+            while not self._queue.empty():
+                batch.append(self._queue.get())
+            rows = [row for row in batch if row is not None]
+            try:
+                with conn:
+                    conn.executemany(
+                        "INSERT INTO history (command, cwd, venv, exit_code, duration, ts) VALUES (?, ?, ?, ?, ?, ?)",
+                        rows
+                    )
+                    conn.executemany(
+                        "INSERT INTO commands (command, uses, last_ts, frecency) VALUES (?, 1, ?, ?) "
+                        "ON CONFLICT(command) DO UPDATE SET uses = uses + 1, last_ts = excluded.last_ts, "
+                        "frecency = logaddexp(frecency, excluded.frecency)",
+                        [(row[0], row[5], row[5] * self._decay) for row in rows]
+                    )
+            except sqlite3.Error as e:
+                print(f"Could not save command history: {e}")
+            for _ in batch:
+                self._queue.task_done()
+            if None in batch:
+                conn.close()
+                return
+
+    def record(self, command, cwd=None, venv=None, exit_code=None, duration=None):
+        """Queue one run of `command`; returns immediately."""
+        if not command or self._failed:
+            return
+        self.start()
+        self._queue.put((command, cwd, venv, exit_code, duration, time.time()))
+
+    def flush(self):
+        if self._writer is not None and not self._failed:
+            self._queue.join()
+
+    def close(self):
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(timeout=5)
+
+    def _query(self, sql, params):
+        conn = self._reader()
+        if conn is None:
+            return []
+        try:
+            return [row[0] for row in conn.execute(sql, params)]
+        except sqlite3.Error:
+            return []
+
+    def recent_commands(self, limit=50000):
+        """The last `limit` successful runs (or built-ins without an exit code), oldest first."""
+        return self._query(
+            "SELECT command FROM (SELECT id, command FROM history WHERE exit_code IS NULL OR exit_code = 0 "
+            "ORDER BY id DESC LIMIT ?) ORDER BY id",
+            (limit,)
+        )
+
+    def top(self, limit=100):
+        """Distinct commands by frecency, best first."""
+        return self._query("SELECT command FROM commands ORDER BY frecency DESC LIMIT ?", (limit,))
+
+    def search_prefix(self, prefix, limit=20, scan_limit=None):
+        """
+        Commands starting with `prefix` (a range scan on the primary key), best first.
+        `scan_limit` bounds how many matches are ranked, for callers on the keystroke path.
+        """
+        if scan_limit is None:
+            return self._query(
+                "SELECT command FROM commands WHERE command >= ? AND command < ? ORDER BY frecency DESC LIMIT ?",
+                (prefix, prefix + "\U0010ffff", limit)
+            )
+        return self._query(
+            "SELECT command FROM (SELECT command, frecency FROM commands WHERE command >= ? AND command < ? LIMIT ?) "
+            "ORDER BY frecency DESC LIMIT ?",
+            (prefix, prefix + "\U0010ffff", scan_limit, limit)
+        )
+
+    def search(self, text, limit=20):
+        """Commands containing `text`, best first."""
+        if self._reader() is not None and self._has_fts and len(text) >= 3:
+            return self._query(
+                "SELECT c.command FROM commands_fts f JOIN commands c ON c.rowid = f.rowid "
+                "WHERE commands_fts MATCH ? ORDER BY c.frecency DESC LIMIT ?",
+                ('"' + text.replace('"', '""') + '"', limit)
+            )
+        escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return self._query(
+            "SELECT command FROM commands WHERE command LIKE ? ESCAPE '\\' ORDER BY frecency DESC LIMIT ?",
+            (f"%{escaped}%", limit)
+        )
+
+
+class PersistentHistory(History):
+    """
+    prompt_toolkit history backed by HistoryStore, for Up-arrow and Ctrl+R.
+    prompt_toolkit loads it in a background thread. Only the `load_limit` best
+    commands by frecency are loaded, best treated as most recent, so Ctrl+R
+    finds the most frecent match first and a huge history does not slow launch.
+    Runs are written by the main loop through HistoryStore.record().
+    """
+
+    def __init__(self, store, load_limit=10000):
+        super().__init__()
+        self.store = store
+        self.load_limit = load_limit
+
+    def load_history_strings(self):
+        yield from self.store.top(self.load_limit)
+
+    def store_string(self, string):
+        pass
+
+
+history_store = HistoryStore(os.path.join(INLINE_HOME, "history.db"))
+
+#Implementing the local next-command predictor (first tier before Gemini)
+class NgramPredictor:
+    """
+    Markov model over whole commands. It counts which command followed each of
+    the last 1..order-1 commands and backs off from the longest context to
+    overall frequency. Training and prediction are a few dict lookups, so it
+    answers long before Gemini does. The overall top-k is kept incrementally
+    (counts only grow), so prediction never scans the vocabulary.
+    """
+
+    def __init__(self, order=3, top_k=10, max_contexts=50000):
+        self.order = order
+        self.top_k = top_k
+        self.max_contexts = max_contexts
+        self._next = {}
+        self._counts = Counter()
+        self._top = []
+        self._recent = deque(maxlen=order - 1)
+        self._lock = threading.Lock()
+
+    def observe(self, cmd):
+        cmd = cmd.strip()
+        if not cmd:
+            return
+        with self._lock:
+            context = tuple(self._recent)
+            for n in range(1, len(context) + 1):
+                self._next.setdefault(context[-n:], Counter())[cmd] += 1
+            self._counts[cmd] += 1
+            if cmd in self._top:
+                self._top.sort(key=self._counts.get, reverse=True)
+            elif len(self._top) < self.top_k or self._counts[cmd] > self._counts[self._top[-1]]:
+                self._top.append(cmd)
+                self._top.sort(key=self._counts.get, reverse=True)
+                del self._top[self.top_k:]
+            self._recent.append(cmd)
+            if len(self._next) > self.max_contexts:
+                # Forget the rarest contexts; rare enough that a sort is fine
+                ranked = sorted(self._next, key=lambda c: sum(self._next[c].values()))
+                for context in ranked[:len(ranked) // 4]:
+                    del self._next[context]
+
+    def predict(self, k=5, context=None):
+        """Most likely next commands after `context` (default: the last ones observed)."""
+        with self._lock:
+            context = tuple(self._recent if context is None else context)[-(self.order - 1):]
+            predicted = []
+            for n in range(len(context), 0, -1):
+                followers = self._next.get(context[-n:])
+                if followers:
+                    for cmd, _ in followers.most_common(k):
+                        if cmd not in predicted:
+                            predicted.append(cmd)
+                if len(predicted) >= k:
+                    return predicted[:k]
+            for cmd in self._top:
+                if cmd not in predicted:
+                    predicted.append(cmd)
+            return predicted[:k]
+
+
+command_predictor = NgramPredictor()
+
+def predict_locally():
+    """Offer the local predictions in the suggestion index (without counting them as uses)."""
+    apply_predictions(command_predictor.predict())
+
+def seed_suggestions_from_history(limit=1000, train_limit=50000):
+    """
+    Warm the suggestion index with the most frecent saved commands (lowest first)
+    and train the local predictor on the latest successful runs.
+    """
+    for cmd in reversed(history_store.top(limit)):
+        suggestion_index.add(cmd)
+    for cmd in history_store.recent_commands(train_limit):
+        command_predictor.observe(cmd)
+
+cmd_history = []
+bindings = KeyBindings()
+history = PersistentHistory(history_store)
+class AutoSuggestCmd(AutoSuggest):
+    """
+    Ghost text from the in-memory suggestion index. When it has nothing for the
+    prefix, the full history on disk is asked instead (older or rarer commands
+    that the index does not keep).
+    """
+
+    def __init__(self, store=None):
+        self.store = store
+        self._miss = None     # a prefix with no match on disk; longer ones have none either
+
+    @traced("autosuggest")
+    def get_suggestion(self, buffer, document):
+        text = document.text.strip()
+        if text is None:
+            return None
+        for cmd in suggestion_index.suggestions(text):
+            if cmd.startswith(text) and cmd != text:
+                return Suggestion(cmd[len(text):])
+        if self.store is None or len(text) < 2 or (self._miss is not None and text.startswith(self._miss)):
+            return None
+        for cmd in self.store.search_prefix(text, limit=5, scan_limit=500):
+            if cmd != text:
+                return Suggestion(cmd[len(text):])
+        self._miss = text
+        return None
+
+#Implementing the background AI command prediction
+PREDICTION_DEBOUNCE = float(os.getenv('INLINE_PREDICTION_DEBOUNCE', '1.5'))
+PREDICTION_MIN_INTERVAL = float(os.getenv('INLINE_PREDICTION_MIN_INTERVAL', '10'))
+
+class PredictionWorker:
+    """
+    Single background thread for AI command prediction.
+
+    submit() only replaces the pending history snapshot, so bursts coalesce.
+    The worker sends the newest snapshot once submissions have been quiet for
+    `debounce` seconds and `min_interval` seconds have passed since the last
+    request (an urgent submit, i.e. Ctrl+T, skips the interval). A blocking
+    Gemini call cannot be aborted, so a request overtaken by a newer
+    submission has its result dropped instead of applied late.
+    """
+
+    def __init__(self, predict, apply, debounce=PREDICTION_DEBOUNCE, min_interval=PREDICTION_MIN_INTERVAL):
+        self.predict = predict
+        self.apply = apply
+        self.debounce = debounce
+        self.min_interval = min_interval
+        self.sent = 0
+        self.dropped = 0
+        self._pending = None
+        self._urgent = False
+        self._generation = 0
+        self._submitted_at = 0.0
+        self._last_sent = float("-inf")
+        self._thread = None
+        self._cond = threading.Condition()
+
+    def submit(self, history_snapshot, urgent=False):
+        with self._cond:
+            self._pending = list(history_snapshot)
+            self._urgent = self._urgent or urgent
+            self._generation += 1
+            self._submitted_at = time.monotonic()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _next_request(self):
+        with self._cond:
+            while True:
+                if self._pending is None:
+                    self._cond.wait()
+                    continue
+                now = time.monotonic()
+                wait = self._submitted_at + self.debounce - now
+                if not self._urgent:
+                    wait = max(wait, self._last_sent + self.min_interval - now)
+                if wait <= 0:
+                    break
+                self._cond.wait(wait)
+            snapshot, generation = self._pending, self._generation
+            self._pending = None
+            self._urgent = False
+            self._last_sent = now
+            self.sent += 1
+            return snapshot, generation
+
+    def _run(self):
+        while True:
+            snapshot, generation = self._next_request()
+            try:
+                predicted = self.predict(snapshot)
+            except Exception:
+                predicted = []
+            with self._cond:
+                if generation != self._generation:
+                    self.dropped += 1
+                    continue
+            self.apply(predicted)
+
+
+def apply_predictions(predicted_cmds):
+    suggestion_index.predict(predicted_cmds)
+
+prediction_worker = PredictionWorker(suggest_commands, apply_predictions)
+
+@bindings.add('c-t')
+def _(event):
+    predict_locally()
+    prediction_worker.submit(cmd_history, urgent=True)
+
+#Implementing the streaming execution of shell commands
+OUTPUT_TAIL_BYTES = int(os.getenv('INLINE_OUTPUT_TAIL_KB', '64')) * 1024
+
+class OutputTail:
+    """Ring buffer that keeps only the last `limit` bytes written to it."""
+
+    def __init__(self, limit=OUTPUT_TAIL_BYTES):
+        self.limit = limit
+        self._chunks = deque()
+        self._size = 0
+
+    def write(self, data):
+        if len(data) >= self.limit:
+            self._chunks.clear()
+            data = data[-self.limit:]
+            self._size = 0
+        self._chunks.append(data)
+        self._size += len(data)
+        while self._size > self.limit:
+            overflow = self._size - self.limit
+            head = self._chunks[0]
+            if len(head) <= overflow:
+                self._chunks.popleft()
+                self._size -= len(head)
+            else:
+                self._chunks[0] = head[overflow:]
+                self._size -= overflow
+
+    def getvalue(self):
+        return b"".join(self._chunks).decode("utf-8", errors="replace")
+
+@traced("shell.fresh")
+def run_streaming(cmd, tail_bytes=OUTPUT_TAIL_BYTES):
+    """
+    Run `cmd` through the shell and copy its output to the terminal as it is produced.
+    stderr is merged into stdout so the two stay interleaved; only the last
+    `tail_bytes` are kept. Returns a CompletedProcess whose stdout is that tail.
+    """
+    proc = subprocess.Popen(cmd, shell=True, env=os.environ.copy(), stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    tail = OutputTail(tail_bytes)
+    out = sys.stdout.buffer
+    sys.stdout.flush()
     try:
-        if first_path_flag == False:
-            current_path = os.getcwd()
-            first_path_flag = True
-
-        venv_prefix = f"({os.path.basename(os.environ['VIRTUAL_ENV'])}) " if 'VIRTUAL_ENV' in os.environ else ""
-        text = prompt(
-            f"{venv_prefix}inlineTerminal<{current_path}> $ ",
-            completer=completer,
-            placeholder='⮞ Ctrl+T → Get AI CLI suggestions',
-            auto_suggest=AutoSuggestCmd(),
-            key_bindings=bindings,
-            history=history,
-            bottom_toolbar=HTML('<b><style fg="cyan">⮞ Right Arrow: accept suggestion | Tab: autocomplete | Ctrl+T: get AI suggestions | inline --ask: ask Query | inline --execute: ask and execute Query | inline --contact: Get contact of Inline Team </style></b>')
-        ).strip()
-        history.append_string(text)
-
-        cmdLine = text.split(" ")
-
-        if text.lower() == 'exit':
+        fd = proc.stdout.fileno()
+        while True:
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                break
+            out.write(chunk)
+            out.flush()
+            tail.write(chunk)
+        returncode = proc.wait()
+    except KeyboardInterrupt:
+        proc.kill()
+        proc.wait()
+        raise
+    finally:
+        proc.stdout.close()
+    return subprocess.CompletedProcess(cmd, returncode, stdout=tail.getvalue())
+
+#Implementing the persistent shell session (one long-lived shell for every command)
+# __inline_strip VAR ENTRY: drop ENTRY from the :-separated list in $VAR
+_STRIP_FUNCTION = r'''__inline_strip() { eval "__v=\${$1}"; __l=; __s=$IFS; IFS=:; set -f
+for __e in $__v; do [ "$__e" = "$2" ] || __l="${__l:+$__l:}$__e"; done
+set +f; IFS=$__s; eval "$1=\$__l"; export "$1"; }
+'''
+
+class ShellSession:
+    """
+    Runs commands in one long-lived POSIX shell fed over a pipe, so exports,
+    aliases and functions survive between commands and no shell is spawned per
+    command. A sentinel line printed after each command carries its exit code
+    and the shell's working directory, which is mirrored into this process.
+    """
+
+    def __init__(self, shell=None, tail_bytes=OUTPUT_TAIL_BYTES):
+        if shell is None:
+            shell = "/bin/bash" if os.path.exists("/bin/bash") else "/bin/sh"
+        self.shell = shell
+        self.tail_bytes = tail_bytes
+        self._proc = None
+        self._env = {}
+        self._marker = f"__INLINE_DONE_{uuid.uuid4().hex}__".encode()
+
+    def start(self):
+        self._proc = subprocess.Popen(
+            [self.shell], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT, env=os.environ.copy(), cwd=os.getcwd(), bufsize=0
+        )
+        self._env = dict(os.environ)
+        # A trap (unlike an ignore) is reset in children, so Ctrl+C still stops
+        # the running command but leaves the session alive
+        self._send("trap ':' INT\nshopt -s expand_aliases 2>/dev/null\n"
+                   + _STRIP_FUNCTION)
+
+    def alive(self):
+        return self._proc is not None and self._proc.poll() is None
+
+    def close(self):
+        if self._proc is not None:
+            try:
+                self._proc.stdin.close()
+                self._proc.wait(timeout=1)
+            except Exception:
+                self._proc.kill()
+            self._proc.stdout.close()
+            self._proc = None
+
+    def _send(self, script):
+        self._proc.stdin.write(script.encode())
+        self._proc.stdin.flush()
+
+    @staticmethod
+    def _list_delta(key, old, new):
+        """
+        Shell lines turning a :-separated list like PATH from `old` into `new`
+        without touching entries the shell added itself (an `export PATH=...`
+        typed in the session): entries we removed are stripped, entries we put
+        in front are prepended. None when the change is not of that shape.
+        """
+        old_entries = old.split(os.pathsep) if old else []
+        new_entries = new.split(os.pathsep) if new else []
+        kept = [e for e in old_entries if e in new_entries]
+        added = new_entries[:len(new_entries) - len(kept)]
+        if new_entries[len(added):] != kept or any(e in old_entries for e in added):
+            return None
+        lines = [f"__inline_strip {key} {shlex.quote(e)}" for e in old_entries if e not in new_entries and e]
+        if added:
+            lines.append(f"export {key}={shlex.quote(os.pathsep.join(added))}\"${{{key}:+:${key}}}\"")
+        return lines
+
+    def _sync_env(self):
+        """Push changes made to os.environ on our side (e.g. by activate) to the shell."""
+        lines = []
+        for key, value in os.environ.items():
+            if self._env.get(key) != value and re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", key):
+                delta = self._list_delta(key, self._env[key], value) if key in ("PATH", "PYTHONPATH") and key in self._env else None
+                lines.extend(delta if delta is not None else [f"export {key}={shlex.quote(value)}"])
+        for key in self._env.keys() - os.environ.keys():
+            if re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", key):
+                lines.append(f"unset {key}")
+        lines.append(f"cd {shlex.quote(os.getcwd())} 2>/dev/null")
+        self._env = dict(os.environ)
+        return "\n".join(lines) + "\n"
+
+    @traced("shell.session")
+    def run(self, cmd, out=None):
+        """
+        Run `cmd` in the session, streaming its output to `out` (the terminal by default).
+        Returns a CompletedProcess whose stdout is the last `tail_bytes` of output.
+        """
+        if not self.alive():
+            self.start()
+        out = out if out is not None else sys.stdout.buffer
+        sys.stdout.flush()
+        stdin = "/dev/tty" if sys.stdin.isatty() else "/dev/null"
+        # eval keeps a syntax error in `cmd` from swallowing the sentinel
+        self._send(
+            self._sync_env()
+            + f"__inline_cmd={shlex.quote(cmd)}\n"
+            + f"{{ eval \"$__inline_cmd\"; }} < {stdin}\n"
+            + f"printf '\\n%s %s %s\\n' '{self._marker.decode()}' \"$?\" \"$PWD\"\n"
+        )
+
+        tail = OutputTail(self.tail_bytes)
+        fd = self._proc.stdout.fileno()
+        pending = b""
+        interrupted = False
+        keep = len(self._marker) + 1
+        while True:
+            try:
+                chunk = os.read(fd, 65536)
+            except KeyboardInterrupt:
+                interrupted = True
+                continue
+            if not chunk:
+                # `exit` or a crash took the shell down; the next command starts a new one
+                out.write(pending)
+                out.flush()
+                tail.write(pending)
+                returncode = self._proc.wait()
+                self.close()
+                return subprocess.CompletedProcess(cmd, returncode, stdout=tail.getvalue())
+            pending += chunk
+            index = pending.find(b"\n" + self._marker)
+            if index == -1:
+                if len(pending) > keep:
+                    out.write(pending[:-keep])
+                    out.flush()
+                    tail.write(pending[:-keep])
+                    pending = pending[-keep:]
+                continue
+            while pending.find(b"\n", index + 1) == -1:
+                pending += os.read(fd, 65536) or b"\n"
+            out.write(pending[:index])
+            if index and not pending[:index].endswith(b"\n"):
+                out.write(b"\n")
+            out.flush()
+            tail.write(pending[:index])
+            status = pending[index + 1:pending.find(b"\n", index + 1)].decode(errors="replace")
             break
-        elif text == 'deactivate':
-            if deactivate_venv():
-                if text not in suggestion_set:
-                    suggestion_set.add(text)
-                    suggestion_list.append(text)
-                    command_completer = WordCompleter(suggestion_list, ignore_case=True)
-                    completer = CompositeCompleter(command_completer, path_completer)
-        elif text.startswith('activate'):
-            if len(cmdLine) == 1:
-                print("[!] Usage: activate <venv-path>")
+
+        _, returncode, cwd = status.split(" ", 2)
+        try:
+            os.chdir(cwd)
+        except OSError:
+            pass
+        self._env = dict(os.environ)
+        if interrupted:
+            raise KeyboardInterrupt
+        return subprocess.CompletedProcess(cmd, int(returncode), stdout=tail.getvalue())
+
+
+shell_session = None
+
+def set_shell_session(enabled):
+    """Switch the persistent shell session on or off for the commands typed at the prompt."""
+    global shell_session
+    if enabled and shell_session is None:
+        if os.name == "nt":
+            print("Persistent shell sessions need a POSIX shell; staying with one shell per command")
+            return False
+        shell_session = ShellSession()
+    elif not enabled and shell_session is not None:
+        shell_session.close()
+        shell_session = None
+    return True
+
+# Set while a command runs for real in the foreground: Ctrl+C is then the command's
+command_running = threading.Event()
+
+def run_command(cmd):
+    """Run a typed command through the shell session when enabled, else in a fresh shell."""
+    command_running.set()
+    try:
+        if shell_session is not None:
+            return shell_session.run(cmd)
+        return run_streaming(cmd)
+    finally:
+        command_running.clear()
+
+#Implementing the Docker for the secure terminal
+DOCKER = os.getenv('INLINE_DOCKER', 'docker')
+SANDBOX_IMAGE = os.getenv('INLINE_SANDBOX_IMAGE', 'ubuntu')
+SANDBOX_POOL_SIZE = int(os.getenv('INLINE_SANDBOX_POOL_SIZE', '2'))
+SANDBOX_TIMEOUT = float(os.getenv('INLINE_SANDBOX_TIMEOUT', '5'))
+SANDBOX_START_TIMEOUT = float(os.getenv('INLINE_SANDBOX_START_TIMEOUT', '30'))
+SANDBOX_LIMITS = [
+    "--network", "none",     # no internet
+    "--memory", "128m",      # RAM limit
+    "--cpus", "0.5",         # CPU limit
+    "--pids-limit", "50",    # limit processes (stops fork bombs)
+]
+SANDBOX_TIMEOUT_MESSAGE = "[!] Command killed (timeout — harmful or infinite loop)."
+SANDBOX_LABEL = "inline-terminal-sandbox"   # value: pid of the terminal that owns the container
+
+
+class SandboxUnavailable(Exception):
+    pass
+
+
+def _pid_alive(pid):
+    """Whether a process with this pid (as text) is running here; unlabelled means unknown owner, i.e. stale."""
+    if not pid.isdigit():
+        return False
+    if os.name == "nt":
+        return True     # os.kill(pid, 0) would send CTRL_C_EVENT there
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+class SandboxPool:
+    """
+    Keeps `size` sandbox containers started ahead of time (same limits as the
+    one-off `docker run`), so a preview only pays for a `docker exec`.
+    A container is used for exactly one preview, then removed and replaced in
+    the background, so every preview starts from a clean image.
+    Containers are labelled with the owning terminal's pid; those left behind by
+    a terminal that is gone (killed before its atexit cleanup) are removed on start.
+    """
+
+    def __init__(self, size=SANDBOX_POOL_SIZE, image=SANDBOX_IMAGE, exec_timeout=SANDBOX_TIMEOUT,
+                 start_timeout=SANDBOX_START_TIMEOUT, docker=DOCKER):
+        self.size = size
+        self.image = image
+        self.exec_timeout = exec_timeout
+        self.start_timeout = start_timeout
+        self.docker = docker
+        self.last_error = None
+        self._idle = []
+        self._starting = 0
+        self._started = False
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def start(self):
+        with self._cond:
+            if self._started or self._closed:
+                return
+            self._started = True
+            self._starting += self.size
+        atexit.register(self.close)
+        threading.Thread(target=self._remove_stale, daemon=True).start()
+        for _ in range(self.size):
+            threading.Thread(target=self._spawn, daemon=True).start()
+
+    def _remove_stale(self):
+        try:
+            result = subprocess.run(
+                [self.docker, "ps", "-a", "--filter", f"label={SANDBOX_LABEL}",
+                 "--format", f'{{{{.ID}}}} {{{{.Label "{SANDBOX_LABEL}"}}}}'],
+                capture_output=True, text=True, timeout=self.start_timeout
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return
+        for line in result.stdout.splitlines():
+            container_id, _, owner = line.partition(" ")
+            if container_id and not _pid_alive(owner.strip()):
+                self._remove(container_id)
+
+    def _spawn(self):
+        container_id = None
+        try:
+            result = subprocess.run(
+                [self.docker, "run", "-d", "--rm", *SANDBOX_LIMITS,
+                 "--label", f"{SANDBOX_LABEL}={os.getpid()}", self.image, "sleep", "infinity"],
+                capture_output=True, text=True, timeout=self.start_timeout
+            )
+            if result.returncode == 0 and result.stdout.strip():
+                container_id = result.stdout.strip()
             else:
-                venv_path = cmdLine[1]
-                if activate_venv(venv_path):
-                    if text not in suggestion_set:
-                        suggestion_set.add(text)
-                        suggestion_list.append(text)
-                        command_completer = WordCompleter(suggestion_list, ignore_case=True)
-                        completer = CompositeCompleter(command_completer, path_completer)
-        elif text.startswith("inline"):
-            if len(cmdLine) == 1:
-                print("did you mean inline --help")
-            elif text == 'inline --help':
-                print(help_method)
-            elif text == 'inline --contact':
-                print(contact_inline)
-            elif text.startswith("inline --ask"):
+                self.last_error = result.stderr.strip() or f"docker run exited with {result.returncode}"
+        except (OSError, subprocess.TimeoutExpired) as e:
+            self.last_error = str(e)
+        with self._cond:
+            self._starting -= 1
+            if container_id is not None and not self._closed:
+                self._idle.append(container_id)
+                container_id = None
+            self._cond.notify_all()
+        if container_id is not None:
+            self._remove(container_id)
+
+    def _remove(self, container_id):
+        try:
+            subprocess.run([self.docker, "rm", "-f", container_id], capture_output=True, timeout=self.start_timeout)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+
+    def _recycle(self, container_id, replace):
+        self._remove(container_id)
+        if replace:
+            self._spawn()
+
+    def acquire(self):
+        """Take a warm container, waiting for one that is still starting."""
+        self.start()
+        deadline = time.monotonic() + self.start_timeout
+        with self._cond:
+            while not self._idle:
+                remaining = deadline - time.monotonic()
+                if self._closed or self._starting == 0 or remaining <= 0:
+                    raise SandboxUnavailable(self.last_error or "no sandbox container available")
+                self._cond.wait(remaining)
+            return self._idle.pop()
+
+    def release(self, container_id):
+        # Count the replacement as starting right away, so an acquire() made
+        # before the recycle thread runs waits for it instead of giving up
+        with self._cond:
+            replace = not self._closed
+            if replace:
+                self._starting += 1
+        threading.Thread(target=self._recycle, args=(container_id, replace), daemon=True).start()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for container_id in idle:
+            self._remove(container_id)
+
+
+sandbox_pool = SandboxPool() if SANDBOX_POOL_SIZE > 0 else None
+
+class SandboxPreview:
+    """
+    A sandbox run in a background thread: from a warm container of `pool`
+    (sandbox_pool by default) when one is available, else a one-off `docker
+    run` with the pool's docker and image. cancel() kills it right away;
+    `on_done(result)` is called when it finishes (not when cancelled).
+    """
+
+    def __init__(self, cmd, timeout=None, on_done=None, pool=None):
+        self.cmd = cmd
+        self.pool = pool if pool is not None else sandbox_pool
+        self.docker = self.pool.docker if self.pool is not None else DOCKER
+        self.image = self.pool.image if self.pool is not None else SANDBOX_IMAGE
+        if timeout is None:
+            timeout = self.pool.exec_timeout if self.pool is not None else SANDBOX_TIMEOUT
+        self.timeout = timeout
+        self.on_done = on_done
+        self.result = None
+        self.cancelled = False
+        self.done = threading.Event()
+        self._proc = None
+        self._cold_name = None
+        self._lock = threading.Lock()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        container_id = None
+        try:
+            with tracer.span("sandbox.preview"):
+                if self.pool is not None:
+                    try:
+                        container_id = self.pool.acquire()
+                    except SandboxUnavailable:
+                        pass
+                if container_id is not None:
+                    argv = [self.docker, "exec", container_id, "bash", "-c", self.cmd]
+                else:
+                    self._cold_name = f"inline-preview-{uuid.uuid4().hex[:12]}"
+                    argv = [self.docker, "run", "--rm", "--name", self._cold_name, *SANDBOX_LIMITS,
+                            self.image, "bash", "-c", self.cmd]
+                with self._lock:
+                    if self.cancelled:
+                        return
+                    self._proc = subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
                 try:
-                    Query = text[12:]
-                    if Query.strip() == "":
-                        print("You do not have asked anything")
+                    stdout, stderr = self._proc.communicate(timeout=self.timeout)
+                    self.result = stdout if stdout else stderr
+                except subprocess.TimeoutExpired:
+                    self._kill()
+                    self._proc.communicate()
+                    self.result = SANDBOX_TIMEOUT_MESSAGE
+        except OSError as e:
+            self.result = f"[!] Sandbox preview failed: {e}"
+        finally:
+            if container_id is not None:
+                self.pool.release(container_id)
+            self.done.set()
+        if self.on_done is not None and not self.cancelled:
+            self.on_done(self.result)
+
+    def _kill(self):
+        if self._proc is None:
+            return
+        if self._proc.poll() is None:
+            self._proc.kill()
+        # Killing the docker client does not stop a one-off container
+        if self._cold_name is not None:
+            threading.Thread(
+                target=subprocess.run,
+                args=([self.docker, "rm", "-f", self._cold_name],),
+                kwargs={"capture_output": True},
+                daemon=True
+            ).start()
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+        if not self.done.is_set():
+            self._kill()
+
+    def wait(self, timeout=None):
+        self.done.wait(timeout)
+        return self.result
+
+
+def run_in_docker(cmd, timeout=SANDBOX_TIMEOUT):
+    return SandboxPreview(cmd, timeout=timeout).wait()
+
+
+
+
+
+#Implementing the dependency-aware execution of inline --execute plans
+EXECUTE_WORKERS = int(os.getenv('INLINE_EXECUTE_WORKERS', '1'))   # 1 keeps the plain sequential && chain
+EXECUTE_PIPELINED = os.getenv('INLINE_EXECUTE_PIPELINE', '0') != '0'   # confirm while the sandbox preview runs
+
+# Commands whose only effect is on the shell's own state; they are replayed in
+# front of every later step instead of running as steps of their own
+STATE_COMMANDS = {"cd", "chdir", "pushd", "popd", "export", "set", "setx", "unset", "source", ".",
+                  "alias", "unalias", "activate", "deactivate", "umask", "ulimit"}
+# Tools that are only state commands with some subcommands (conda install is real work)
+STATE_SUBCOMMANDS = {"conda": {"activate", "deactivate"}, "nvm": {"use"}, "pyenv": {"shell", "local"}}
+# Programs whose every argument (apart from flags) is a path, even one that does not exist yet
+PATH_PROGRAMS = {"mkdir", "touch", "rm", "rmdir", "cp", "mv", "ln", "cat", "chmod", "chown", "tar",
+                 "unzip", "zip", "head", "tail", "wc", "stat", "less", "more", "tee", "truncate"}
+# Flags whose value is a path
+PATH_FLAGS = {"-C", "-f", "-o", "-r", "-t", "--prefix", "--cwd", "--dir", "--directory", "--file",
+              "--output", "--requirement", "--target", "--manifest-path", "--project"}
+SHELL_OPERATORS = {"&&", "||", ";", "|", "&"}
+
+
+class PlanStep:
+    def __init__(self, index, command, script, cwd, resources, program, barrier):
+        self.index = index
+        self.command = command
+        self.script = script        # command with the shell-state prefix it needs
+        self.cwd = cwd              # absolute directory the step runs in
+        self.resources = resources  # absolute paths named by the step's arguments
+        self.program = program
+        self.barrier = barrier
+        self.deps = set()
+
+    def targets(self):
+        """What the step works on: the paths it names, else its working directory."""
+        return self.resources or {self.cwd}
+
+
+def _resolve(cwd, path):
+    return os.path.normpath(path if os.path.isabs(path) else os.path.join(cwd, os.path.expanduser(path)))
+
+def _overlaps(a, b):
+    """Whether two absolute paths are the same or one contains the other."""
+    return a == b or a.startswith(b.rstrip(os.sep) + os.sep) or b.startswith(a.rstrip(os.sep) + os.sep)
+
+def _is_state_command(words):
+    program = os.path.basename(words[0]).lower()
+    if program in STATE_SUBCOMMANDS:
+        return len(words) > 1 and words[1] in STATE_SUBCOMMANDS[program]
+    return program in STATE_COMMANDS
+
+def _looks_like_path(word, cwd):
+    return (os.sep in word or "/" in word or word.startswith((".", "~"))
+            or re.search(r"\.[A-Za-z0-9]{1,5}$", word) is not None
+            or os.path.exists(_resolve(cwd, word)))
+
+def _step_paths(words, cwd):
+    """
+    The step's own working directory (after any leading `cd x &&`) and the
+    paths its arguments name: words that look like paths or exist, every
+    argument of file tools like mkdir/rm/cp, and the values of flags such as
+    --prefix or -r. Subcommands (`install`, `ci` ...) are not paths.
+    """
+    resources = set()
+    program = ""
+    segments = [[]]
+    for word in words:
+        if word in SHELL_OPERATORS:
+            segments.append([])
+        else:
+            segments[-1].append(word)
+    for segment in segments:
+        if not segment:
+            continue
+        name = os.path.basename(segment[0]).lower()
+        if name in ("cd", "chdir", "pushd"):
+            if len(segment) > 1:
+                cwd = _resolve(cwd, segment[-1])
+            continue
+        program = program or name
+        path_args = name in PATH_PROGRAMS
+        expects_path = False
+        for word in segment[1:]:
+            flag, eq, value = word.partition("=")
+            if word.startswith("-"):
+                if flag in PATH_FLAGS:
+                    if eq and value:
+                        resources.add(_resolve(cwd, value))
                     else:
-                        askQuestions(Query)
-                except Exception as e:
-                    print(f"Error Occurred: {e}")
-            elif text.startswith("inline --execute"):
+                        expects_path = True
+                continue
+            if not word or word.startswith("$") or word[0] in "<>" or word.isdigit():
+                continue
+            if expects_path or path_args or _looks_like_path(word, cwd):
+                resources.add(_resolve(cwd, word))
+            expects_path = False
+    return cwd, program, resources
+
+def plan_commands(cmds, base=None):
+    """
+    Split a command list into steps with dependencies.
+    Shell-state commands (cd, export, source, conda activate ...) are prefixed to
+    the steps after them. A step depends on an earlier one when the paths they
+    work on overlap (see _step_paths; a step that names no path works on its
+    directory), or when both run the same program in the same directory without
+    naming paths (two `npm install` in one project). A step that cannot be
+    tokenized is a barrier that orders everything around it.
+    Paths are resolved against `base` (the current directory by default).
+    """
+    steps = []
+    state_prefix = []
+    cwd = os.path.abspath(base or os.getcwd())
+    for cmd in cmds:
+        try:
+            words = shlex.split(cmd, posix=os.name != "nt")
+        except ValueError:
+            words = None
+
+        if words and _is_state_command(words) and not any(op in cmd for op in ("&&", "||", ";", "|")):
+            state_prefix.append(cmd)
+            if os.path.basename(words[0]).lower() in ("cd", "chdir", "pushd") and len(words) > 1:
+                cwd = _resolve(cwd, words[-1])
+            continue
+
+        if words:
+            step_cwd, program, resources = _step_paths(words, cwd)
+        else:
+            step_cwd, program, resources = cwd, "", set()
+        script = " && ".join(state_prefix + [cmd])
+        steps.append(PlanStep(len(steps), cmd, script, step_cwd, resources, program, barrier=words is None))
+
+    for later in steps:
+        for earlier in steps[:later.index]:
+            if (earlier.barrier or later.barrier
+                    or any(_overlaps(a, b) for a in later.resources for b in earlier.targets())
+                    or any(_overlaps(a, b) for a in earlier.resources for b in later.targets())
+                    or (not earlier.resources and not later.resources
+                        and earlier.program == later.program and earlier.cwd == later.cwd)):
+                later.deps.add(earlier.index)
+    return steps
+
+_print_lock = threading.Lock()
+
+def run_plan(steps, workers=EXECUTE_WORKERS, tail_bytes=OUTPUT_TAIL_BYTES):
+    """
+    Run planned steps, up to `workers` at a time, each as soon as everything it
+    depends on has succeeded. A failed step only stops the steps that depend on
+    it. Output is printed line by line as it comes, prefixed with the step
+    number; only the last `tail_bytes` of each step are kept.
+    Returns {index: exit code, or None if skipped}.
+    """
+    results = {}
+    running = {}
+    pending = list(steps)
+    failed = set()
+
+    def run_step(step):
+        started = time.monotonic()
+        tail = OutputTail(tail_bytes)
+        with tracer.span("plan.step"):
+            # Steps running side by side must not fight over the terminal's input
+            proc = subprocess.Popen(step.script, shell=True, env=os.environ.copy(), stdin=subprocess.DEVNULL,
+                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            try:
+                for line in iter(lambda: proc.stdout.readline(65536), b""):
+                    tail.write(line)
+                    text = line.decode("utf-8", errors="replace").rstrip("\n")
+                    with _print_lock:
+                        print(f"[step {step.index + 1}] {text}")
+                returncode = proc.wait()
+            finally:
+                if proc.poll() is None:
+                    proc.kill()
+                    proc.wait()
+                proc.stdout.close()
+        return returncode, tail.getvalue(), time.monotonic() - started
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        while pending or running:
+            for step in list(pending):
+                if step.deps & failed:
+                    pending.remove(step)
+                    failed.add(step.index)
+                    results[step.index] = None
+                    print(f"[step {step.index + 1}] skipped, it depends on a failed step: {step.command}")
+                elif len(running) < max(1, workers) and all(d in results for d in step.deps):
+                    pending.remove(step)
+                    running[pool.submit(run_step, step)] = step
+            if not running:
+                continue
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                step = running.pop(future)
                 try:
-                    Query = text[len("inline --execute"):]
-                    if Query.strip() == "":
-                        print("Do not have anything to Execute")
-                    else:
-                        execute_cmd_list = executeQuery(Query)
-                        for i in range(2):
-                            time.sleep(3)
-                            if not execute_cmd_list:
-                                execute_cmd_list = executeQuery(Query)
-                            else:
-                                break
-                        if execute_cmd_list:
-                            print("List of Commands to be executed (given sequentially): ")
-                            for commands_tobe_executed in execute_cmd_list:
-                                print(commands_tobe_executed)
-                            print('####')
-                            print('####')
-                            combined_command = " && ".join(execute_cmd_list)
-                            virtual_execution_result = run_in_docker(combined_command)
-                            print("#### RESULT OF DOCKER ####")
-                            print(virtual_execution_result)
-                            print()
-                            print()
-                            print()
-                            execute_command_confirmation = input("Do you Want to Continue with Above List of Commands??(Y/N): ")
-                            while(execute_command_confirmation.lower() not in ['y', 'n']):
-                                print("Y/N?")
-                                execute_command_confirmation = input("Do you Want to Continue with Above List of Commands??(Y/N): ")
-
-                            if execute_command_confirmation.lower() == "y":
-                                print(f"Executing: {combined_command}")
-                                try:
-                                    cmdExecution = subprocess.run(combined_command, shell=True, env=os.environ.copy(), capture_output=True, text=True)
-                                    if cmdExecution.stdout:
-                                        print()
-                                        print()
-                                        print('Output is given below : ')
-                                        print(cmdExecution.stdout.strip())
-                                    if cmdExecution.stderr:
-                                        print(cmdExecution.stderr.strip())
-                                    if cmdExecution.returncode == 0:
-                                        cmd_history.append(text)
-                                        if text not in suggestion_set:
-                                            suggestion_set.add(text)
-                                            suggestion_list.append(text)
-                                            command_completer = WordCompleter(suggestion_list, ignore_case=True)
-                                            completer = CompositeCompleter(command_completer, path_completer)
-                                except Exception as e:
-                                    print(f"Error Occurred: {e}")
-                            elif execute_command_confirmation.lower() == "n":
-                                print("YOU HIT NO!! ")
-                        else:
-                            print("!!! Failed to fetch the commands, please modify your command or try again")
+                    returncode, _, duration = future.result()
                 except Exception as e:
-                    print(f"Gemini Network Error: {e}")
+                    returncode, duration = 1, 0.0
+                    print(f"[step {step.index + 1}] {e}")
+                results[step.index] = returncode
+                if returncode != 0:
+                    failed.add(step.index)
+                with _print_lock:
+                    print(f"[step {step.index + 1}] exit {returncode} in {duration:.1f}s: {step.command}")
+    return results
+
+def describe_plan(steps):
+    for step in steps:
+        after = ", ".join(str(d + 1) for d in sorted(step.deps))
+        print(f"  {step.index + 1}. {step.command}" + (f"   (after {after})" if after else "   (independent)"))
+
+def split_execute_flags(Query):
+    """
+    Strip leading --refresh / --parallel[=N] / --pipeline flags, returning
+    (query, refresh, workers, pipelined). workers is None, after printing the
+    usage, when N is not a whole number of at least 1.
+    """
+    refresh = False
+    workers = EXECUTE_WORKERS
+    pipelined = EXECUTE_PIPELINED
+    words = Query.split()
+    while words and words[0].startswith("--"):
+        flag = words.pop(0)
+        if flag == "--refresh":
+            refresh = True
+        elif flag == "--parallel":
+            workers = max(EXECUTE_WORKERS, 4)
+        elif flag.startswith("--parallel="):
+            value = flag.split("=", 1)[1]
+            if not value.isdigit() or int(value) < 1:
+                print(f"[!] Usage: inline --execute --parallel=N <query>, N a whole number >= 1 (got {value!r})")
+                workers = None
+            else:
+                workers = int(value)
+        elif flag == "--pipeline":
+            pipelined = True
+        else:
+            words.insert(0, flag)
+            break
+    return " ".join(words), refresh, workers, pipelined
+
+def ask_yes_no(question):
+    answer = input(question)
+    while answer.lower() not in ['y', 'n']:
+        print("Y/N?")
+        answer = input(question)
+    return answer.lower() == 'y'
+
+def preview_toolbar(preview):
+    """Bottom toolbar for the Y/N question of a pipelined inline --execute: the sandbox preview state."""
+    def toolbar():
+        if preview.done.is_set():
+            return "sandbox preview: done"
+        return "sandbox preview: running... (N cancels it)"
+    return toolbar
+
+def execute_flow(Query, refresh=False, confirm=None, workers=EXECUTE_WORKERS, pipelined=EXECUTE_PIPELINED):
+    """
+    The inline --execute pipeline: turn the query into a command list, preview it
+    in the sandbox, ask for confirmation and run it for real (as a parallel plan
+    when `workers` > 1). When `pipelined`, the confirmation is asked while the
+    preview still runs and answering N cancels it.
+    `confirm(question)` defaults to ask_yes_no; when pipelined it also gets
+    toolbar=, a preview_toolbar to show while the question is up.
+    Returns the exit code of the real run, or None when nothing was run.
+    """
+    # Warm the sandbox containers while Gemini is answering
+    if sandbox_pool is not None:
+        sandbox_pool.start()
+    execute_cmd_list = executeQuery(Query, refresh=refresh)
+    # Network errors are already retried with backoff inside executeQuery,
+    # only an unparsable answer is worth asking again
+    for i in range(2):
+        if execute_cmd_list == []:
+            execute_cmd_list = executeQuery(Query)
+        else:
+            break
+    if foreground_cancelled():
+        return None
+    if not execute_cmd_list:
+        print("!!! Failed to fetch the commands, please modify your command or try again")
+        return None
+
+    steps = None
+    if workers > 1:
+        steps = plan_commands(execute_cmd_list)
+        print(f"Plan of Commands to be executed (up to {workers} at a time): ")
+        describe_plan(steps)
+    else:
+        print("List of Commands to be executed (given sequentially): ")
+        for commands_tobe_executed in execute_cmd_list:
+            print(commands_tobe_executed)
+    print('####')
+    print('####')
+    combined_command = " && ".join(execute_cmd_list)
+    question = "Do you Want to Continue with Above List of Commands??(Y/N): "
+
+    def show_preview(virtual_execution_result):
+        print("#### RESULT OF DOCKER ####")
+        print(virtual_execution_result)
+        print()
+        print()
+        print()
+
+    if pipelined:
+        preview = SandboxPreview(combined_command, on_done=show_preview)
+        if confirm is None:
+            answer = ask_yes_no(question)
+        else:
+            answer = confirm(question, toolbar=preview_toolbar(preview))
+        # Nothing is waiting on the preview anymore, whatever the answer
+        preview.cancel()
+    else:
+        show_preview(run_in_docker(combined_command))
+        answer = (confirm or ask_yes_no)(question)
+    if not answer:
+        print("YOU HIT NO!! ")
+        return None
+
+    if steps is not None:
+        print('Output is given below : ')
+        command_running.set()
+        try:
+            results = run_plan(steps, workers)
+        finally:
+            command_running.clear()
+        failures = [code for code in results.values() if code != 0]
+        return failures[0] if failures and failures[0] is not None else (1 if failures else 0)
+
+    print(f"Executing: {combined_command}")
+    print()
+    print()
+    print('Output is given below : ')
+    return run_command(combined_command).returncode
+
+def run_typed_command(text, confirm=ask_yes_no):
+    """Run a shell command typed at the prompt, asking first when it looks dangerous."""
+    #CHECKING THE COMMAND IS DANGEROUS OR NOT
+    rule = dangerous_rule(text)
+    if rule is not None:
+        print("POTENTIAL DANGEROUS COMMAND!!")
+        print(f"Matched rule: {rule}")
+        print("###")
+        print("###")
+        if not confirm("Do you want to Continue with the command?(Y/N): "):
+            return None
+    return run_command(text).returncode
+
+#Implementing the headless batch mode (python inline_terminal.py --batch FILE|-)
+BATCH_WORKERS = int(os.getenv('INLINE_BATCH_WORKERS', '4'))
+
+def _ms(seconds):
+    return round(seconds * 1e3, 1)
+
+def translate_batch_line(number, text, refresh=False, preview=True):
+    """
+    The part of a batch line that is safe to run concurrently: ask Gemini
+    (inline --ask / --execute), check the commands against the dangerous rules
+    and preview them in the sandbox. Returns the JSON record of the line.
+    """
+    started = time.monotonic()
+    record = {"line": number, "input": text}
+    timings = record["timings"] = {}
+
+    if text.startswith("inline --ask"):
+        Query, ask_refresh = split_refresh_flag(text[len("inline --ask"):])
+        record["kind"] = "ask"
+        answer = askQuestions(Query, refresh=refresh or ask_refresh, echo=False)
+        timings["gemini_ms"] = _ms(time.monotonic() - started)
+        record["answer"] = answer
+        if answer is None:
+            record["error"] = "request failed"
+        return record
+
+    if text.startswith("inline --execute"):
+        Query, execute_refresh, _, _ = split_execute_flags(text[len("inline --execute"):])
+        record["kind"] = "execute"
+        commands = executeQuery(Query, refresh=refresh or execute_refresh)
+        if commands == []:
+            commands = executeQuery(Query)
+        timings["gemini_ms"] = _ms(time.monotonic() - started)
+        if not commands:
+            record["commands"] = None
+            record["error"] = "request failed" if commands is None else "could not parse the command list"
+            return record
+    else:
+        record["kind"] = "command"
+        commands = [text]
+
+    record["commands"] = commands
+    record["dangerous"] = [{"command": cmd, "rule": rule} for cmd in commands
+                           for rule in [dangerous_rule(cmd)] if rule is not None]
+    if preview and record["kind"] == "execute":
+        preview_started = time.monotonic()
+        record["preview"] = SandboxPreview(" && ".join(commands)).wait()
+        timings["preview_ms"] = _ms(time.monotonic() - preview_started)
+    return record
+
+def run_batch_command(cmd, session=None):
+    """
+    Run one --run batch line for real. Like handle_line, `activate` and
+    `deactivate` switch the venv of this process and `cd` moves it, so the
+    lines after them see the change; with a session, every line runs in that
+    one shell and its exports and cd's carry over too.
+    """
+    words = cmd.split()
+    if words[0] in ("activate", "deactivate"):
+        if words[0] == "activate" and len(words) != 2:
+            print("[!] Usage: activate <venv-path>")
+            ok = False
+        else:
+            ok = activate_venv(words[1]) if words[0] == "activate" else deactivate_venv()
+        return subprocess.CompletedProcess(cmd, 0 if ok else 1, stdout="")
+    if session is not None:
+        return session.run(cmd)
+    if words[0] == "cd" and len(words) > 1 and not any(op in cmd for op in ("&&", "||", ";", "|")):
+        try:
+            os.chdir(os.path.expanduser(cmd[3:].strip().strip('"\'')))
+            return subprocess.CompletedProcess(cmd, 0, stdout="")
+        except OSError as e:
+            print(f"cd: {e}")
+            return subprocess.CompletedProcess(cmd, 1, stdout="")
+    return run_streaming(cmd)
+
+def run_batch(lines, out, workers=BATCH_WORKERS, refresh=False, preview=True,
+              dangerous="deny", execute=False, keep_going=False):
+    """
+    Process batch lines (shell commands, inline --ask / inline --execute
+    queries; blank lines and # comments are skipped) and write one JSON record
+    per line to `out`, in input order.
+    Translation and previews of up to `workers` lines run concurrently; with
+    `execute`, the commands are then run for real one line at a time, in order,
+    in one shell session (see run_batch_command) where the platform has one.
+    Dangerous commands are never run unless `dangerous` is "allow" ("skip"
+    leaves them out without failing the batch). After a failed line, later
+    lines are not run unless `keep_going`.
+    Returns 0 when every line succeeded, else 1.
+    """
+    numbered = [(number, text.strip()) for number, text in enumerate(lines, 1)
+                if text.strip() and not text.strip().startswith("#")]
+    failed = False
+    stopped = False
+    session = shell_session
+    if execute and session is None and os.name != "nt":
+        session = ShellSession()
+    with contextlib.ExitStack() as cleanup, \
+            concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        if session is not None and session is not shell_session:
+            cleanup.callback(session.close)
+        futures = [pool.submit(translate_batch_line, number, text, refresh, preview) for number, text in numbered]
+        for future in futures:
+            record = future.result()
+            if "error" in record:
+                record["status"] = "error"
+            elif record["kind"] == "ask" or not execute:
+                record["status"] = "ok"
+            elif stopped:
+                record["status"] = "skipped"
+            elif record["dangerous"] and dangerous != "allow":
+                record["status"] = "denied" if dangerous == "deny" else "skipped"
             else:
-                print("No command found, type inline --help to get help")
-        elif text.startswith('cd') and len(cmdLine) == 1:
-            current_path = os.getcwd()
-            print(current_path)
-        elif text.startswith('cd') and len(cmdLine) > 1:
+                run_started = time.monotonic()
+                result = run_batch_command(" && ".join(record["commands"]), session)
+                record["timings"]["run_ms"] = _ms(time.monotonic() - run_started)
+                record["exit_code"] = result.returncode
+                record["output"] = result.stdout
+                record["status"] = "ok" if result.returncode == 0 else "failed"
+
+            if record["status"] in ("error", "denied", "failed"):
+                failed = True
+                stopped = stopped or (execute and not keep_going)
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+    return 1 if failed else 0
+
+
+def handle_line(text, confirm=None):
+    """
+    Run one line typed at the prompt. Returns False when the terminal should exit.
+    `confirm(question)` asks the Y/N questions (ask_yes_no by default).
+    """
+    started = time.monotonic()
+    typed_in = os.getcwd()
+    exit_code = None
+    history_len_before = len(cmd_history)
+
+    cmdLine = text.split(" ")
+
+    if text.lower() == 'exit':
+        return False
+    elif text == 'deactivate':
+        if deactivate_venv():
+            suggestion_index.add(text)
+    elif text.startswith('activate'):
+        if len(cmdLine) == 1:
+            print("[!] Usage: activate <venv-path>")
+        else:
+            venv_path = cmdLine[1]
+            if activate_venv(venv_path):
+                suggestion_index.add(text)
+    elif text.startswith("inline"):
+        if len(cmdLine) == 1:
+            print("did you mean inline --help")
+        elif text == 'inline --help':
+            print(help_method)
+        elif text == 'inline --contact':
+            print(contact_inline)
+        elif text in ("inline --session on", "inline --session off"):
+            if set_shell_session(text.endswith("on")):
+                print(f"Persistent shell session {'on' if shell_session else 'off'}")
+        elif text.startswith("inline --history"):
+            search_text = text[len("inline --history"):].strip()
+            history_store.flush()
+            found = history_store.search(search_text) if search_text else history_store.top(20)
+            for cmd in found:
+                print(cmd)
+        elif text == "inline --stats":
+            print_stats()
+        elif text.startswith("inline --cache"):
+            if text == "inline --cache clear":
+                response_cache.clear()
+                print("Response cache cleared")
+            else:
+                print(response_cache.stats())
+        elif text.startswith("inline --ask"):
             try:
-                os.chdir(text[3:])
-                if text not in suggestion_set:
-                    suggestion_set.add(text)
-                    suggestion_list.append(text)
-                    # CHANGED: Update completers after directory change
-                    command_completer = WordCompleter(suggestion_list, ignore_case=True)
-                    completer = CompositeCompleter(command_completer, path_completer)
-                current_path = os.getcwd()
+                Query, refresh = split_refresh_flag(text[12:])
+                if Query.strip() == "":
+                    print("You do not have asked anything")
+                else:
+                    askQuestions(Query, refresh=refresh)
             except Exception as e:
-                print(f"Error occurred Invalid Command: {e}")
-        else:
+                print(f"Error Occurred: {e}")
+        elif text.startswith("inline --execute"):
             try:
-                #CHECKING THE COMMAND IS DANGEROUS OR NOT
-                if is_dangerous(text):
-                    print("POTENTIAL DANGEROUS COMMAND!!")
-                    print("###")
-                    print("###")
-                    execute_command_confirmation = input("Do you want to Continue with the command?(Y/N): ")
-                    while execute_command_confirmation.lower() not in ['y', 'n']:
-                        print("Y/N?")
-                        execute_command_confirmation =  input("Do you want to Continue with the command?(Y/N): ")
-                    if execute_command_confirmation.lower()=='y':
-                        # CHANGED: Use text instead of cmdLine for subprocess.run
-                        cmdExecution = subprocess.run(text, shell=True, env=os.environ.copy(), capture_output=True, text=True)
-                        if cmdExecution.stdout:
-                            print(cmdExecution.stdout.strip())
-                        if cmdExecution.stderr:
-                            print(cmdExecution.stderr.strip())
-                        if cmdExecution.returncode == 0:
-                            cmd_history.append(text)
-                            if text not in suggestion_set:
-                                suggestion_set.add(text)
-                                suggestion_list.append(text)
-                                # CHANGED: Update completers after execution
-                                command_completer = WordCompleter(suggestion_list, ignore_case=True)
-                                completer = CompositeCompleter(command_completer, path_completer)
+                Query, refresh, workers, pipelined = split_execute_flags(text[len("inline --execute"):])
+                if workers is None:
+                    pass
+                elif Query.strip() == "":
+                    print("Do not have anything to Execute")
                 else:
-                    cmdExecution = subprocess.run(text, shell=True, env=os.environ.copy(), capture_output=True, text=True)
-                    if cmdExecution.stdout:
-                        print(cmdExecution.stdout.strip())
-                    if cmdExecution.stderr:
-                        print(cmdExecution.stderr.strip())
-                    if cmdExecution.returncode == 0:
+                    exit_code = execute_flow(Query, refresh=refresh, confirm=confirm, workers=workers, pipelined=pipelined)
+                    if exit_code == 0:
                         cmd_history.append(text)
-                        if text not in suggestion_set:
-                            suggestion_set.add(text)
-                            suggestion_list.append(text)
-                            # CHANGED: Update completers after execution
-                            command_completer = WordCompleter(suggestion_list, ignore_case=True)
-                            completer = CompositeCompleter(command_completer, path_completer)
+                        suggestion_index.add(text)
             except Exception as e:
-                print(f"Error Occurred: {e}")
+                print(f"Gemini Network Error: {e}")
+        else:
+            print("No command found, type inline --help to get help")
+    elif text.startswith('cd') and len(cmdLine) == 1:
+        print(os.getcwd())
+    elif text.startswith('cd') and len(cmdLine) > 1:
+        try:
+            cd_ok = True
+            if shell_session is not None:
+                cd_ok = shell_session.run(text).returncode == 0
+            else:
+                os.chdir(text[3:])
+            exit_code = 0 if cd_ok else 1
+            if cd_ok:
+                suggestion_index.add(text)
+                venv_index.scan_async(os.getcwd())
+        except Exception as e:
+            print(f"Error occurred Invalid Command: {e}")
+    else:
+        try:
+            exit_code = run_typed_command(text, confirm=confirm or ask_yes_no)
+            if exit_code == 0:
+                cmd_history.append(text)
+                suggestion_index.add(text)
+        except Exception as e:
+            print(f"Error Occurred: {e}")
 
-        if len(cmd_history) % 2 == 0 and len(cmd_history) > 0:
-            threading.Thread(target=command_prediction_async, daemon=True).start()
+    if text:
+        history_store.record(text, typed_in, os.environ.get("VIRTUAL_ENV"), exit_code, time.monotonic() - started)
 
-    except KeyboardInterrupt:
-        print("\n[KeyboardInterrupt] Type 'exit' to quit.")
-        continue
-    except EOFError:
-        print("\n[EOF] Exiting terminal.")
+    if len(cmd_history) > history_len_before:
+        command_predictor.observe(cmd_history[-1])
+        predict_locally()
+        prediction_worker.submit(cmd_history)
+    # The command may have installed or removed programs (or changed PATH)
+    executable_index.refresh_async()
+    return True
+
+
+#Implementing the background jobs of the asyncio REPL (cmd &, jobs, fg, kill %N)
+class Job:
+    def __init__(self, job_id, text):
+        self.id = job_id
+        self.text = text
+        self.cwd = os.getcwd()
+        self.started = time.monotonic()
+        self.finished = None
+        self.task = None
+        self.proc = None          # the shell process, for `cmd &` jobs
+        self.exit_code = None
+        self.killed = False
+
+    def status(self):
+        if self.finished is None:
+            return "Running"
+        if self.killed:
+            return "Killed"
+        if self.exit_code not in (None, 0):
+            return f"Exit {self.exit_code}"
+        return "Done"
+
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.started
+
+
+class JobTable:
+    """
+    Jobs started from the prompt. Each one is an asyncio task; its result is
+    printed (above the prompt, when one is showing) as soon as it finishes.
+    """
+
+    def __init__(self):
+        self.jobs = OrderedDict()
+        self._next_id = 1
+
+    def start(self, text, run):
+        """Start `run(job)`, a coroutine function returning the text to print when it is done."""
+        job = Job(self._next_id, text)
+        self._next_id += 1
+        self.jobs[job.id] = job
+        job.task = asyncio.get_running_loop().create_task(run(job))
+        job.task.add_done_callback(lambda task: self._finished(job))
+        print(f"[{job.id}] {text}")
+        return job
+
+    def _finished(self, job):
+        job.finished = time.monotonic()
+        output = None
+        if job.task.cancelled():
+            job.killed = True
+        elif job.task.exception() is not None:
+            output = f"Error Occurred: {job.task.exception()}"
+        else:
+            output = job.task.result()
+        print(f"[{job.id}] {job.status()} ({job.elapsed():.1f}s) {job.text}")
+        if output:
+            print(output.rstrip("\n"))
+        history_store.record(job.text, job.cwd, os.environ.get("VIRTUAL_ENV"), job.exit_code, job.elapsed())
+
+    def running(self):
+        return [job for job in self.jobs.values() if job.finished is None]
+
+    def find(self, spec):
+        """`%N`, `N` or nothing (the most recent running job)."""
+        spec = spec.strip().lstrip("%")
+        if not spec:
+            running = self.running()
+            return running[-1] if running else None
+        return self.jobs.get(int(spec)) if spec.isdigit() else None
+
+    def kill(self, job):
+        if job.finished is not None:
+            return
+        job.killed = True
+        if job.proc is not None and job.proc.returncode is None:
+            try:
+                if os.name != "nt":
+                    os.killpg(job.proc.pid, signal.SIGKILL)
+                else:
+                    job.proc.kill()
+            except (ProcessLookupError, PermissionError):
+                pass
+        else:
+            # A thread cannot be stopped; its result is simply dropped
+            job.task.cancel()
+
+    def describe(self):
+        if not self.jobs:
+            print("No jobs")
+        for job in list(self.jobs.values()):
+            print(f"[{job.id}] {job.status():<10} {job.elapsed():6.1f}s  {job.text}")
+            if job.finished is not None:
+                del self.jobs[job.id]
+
+    def kill_all(self):
+        for job in self.running():
+            self.kill(job)
+
+
+jobs = JobTable()
+
+def run_in_thread(work, *args):
+    """
+    asyncio.to_thread on a daemon thread: a Gemini call still pending when the
+    terminal exits must not hold the exit up.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def settle(result, error):
+        if not future.done():
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def target():
+        result, error = None, None
+        try:
+            result = work(*args)
+        except Exception as e:
+            error = e
+        try:
+            loop.call_soon_threadsafe(settle, result, error)
+        except RuntimeError:
+            pass    # the loop is already closed
+    threading.Thread(target=target, daemon=True).start()
+    return future
+
+def shell_job(cmd):
+    """A `cmd &` job: runs in a fresh shell of its own, its output is kept and printed at the end."""
+    async def run(job):
+        with tracer.span("shell.job"):
+            job.proc = await asyncio.create_subprocess_shell(
+                cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                env=os.environ.copy(), cwd=os.getcwd(),
+                # its own process group, so Ctrl+C at the prompt does not reach it
+                start_new_session=os.name != "nt"
+            )
+            tail = OutputTail(OUTPUT_TAIL_BYTES)
+            while True:
+                chunk = await job.proc.stdout.read(65536)
+                if not chunk:
+                    break
+                tail.write(chunk)
+            job.exit_code = await job.proc.wait()
+        return tail.getvalue()
+    return run
+
+def ask_job(Query, refresh):
+    async def run(job):
+        answer = await run_in_thread(askQuestions, Query, refresh, False)
+        if answer is None:
+            job.exit_code = 1
+            return "Something Error has occurred!!!!, Please check the network connection"
+        return answer
+    return run
+
+async def confirm_async(session, question, toolbar=None):
+    """Ask a Y/N question at the prompt session; `toolbar` (a callable) is shown below it and kept fresh."""
+    extra = {"bottom_toolbar": toolbar, "refresh_interval": 0.3} if toolbar is not None else {}
+    while True:
+        with patch_stdout():
+            answer = (await session.prompt_async(question, **extra)).strip().lower()
+        if answer in ('y', 'n'):
+            return answer == 'y'
+        print("Y/N?")
+
+async def foreground(session, work, *args):
+    """
+    Run blocking work (handle_line) in a worker thread and wait for it. Its Y/N
+    questions are asked through `session` on the loop. Ctrl+C, at such a
+    question or while Gemini is answering, stops the wait with KeyboardInterrupt
+    and whatever the thread still returns is dropped; while a command runs for
+    real the Ctrl+C is left to the command.
+    """
+    loop = asyncio.get_running_loop()
+    interrupted = loop.create_future()
+    cancelled = threading.Event()
+
+    def interrupt():
+        cancelled.set()
+        if not interrupted.done():
+            interrupted.set_result(None)
+
+    async def ask(question, toolbar):
+        try:
+            return await confirm_async(session, question, toolbar)
+        except (KeyboardInterrupt, EOFError):
+            interrupt()
+            return False
+
+    def confirm(question, toolbar=None):
+        # called from the worker thread; an interrupted question counts as N
+        if cancelled.is_set():
+            return False
+        return asyncio.run_coroutine_threadsafe(ask(question, toolbar), loop).result()
+
+    def run(*args):
+        _foreground.cancelled = cancelled
+        return work(*args, confirm)
+
+    def on_sigint():
+        if not command_running.is_set():
+            interrupt()
+
+    try:
+        loop.add_signal_handler(signal.SIGINT, on_sigint)
+        handled = True
+    except (NotImplementedError, RuntimeError):
+        handled = False
+    work_done = run_in_thread(run, *args)
+    try:
+        await asyncio.wait([work_done, interrupted], return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        if handled:
+            loop.remove_signal_handler(signal.SIGINT)
+    if not work_done.done():
+        work_done.cancel()
+        raise KeyboardInterrupt
+    return work_done.result()
+
+async def wait_job(job):
+    """`fg`: wait for a job; Ctrl+C kills it."""
+    print(job.text)
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGINT, lambda: jobs.kill(job))
+        handled = True
+    except (NotImplementedError, RuntimeError):
+        handled = False
+    try:
+        await asyncio.wait([job.task])
+    finally:
+        if handled:
+            loop.remove_signal_handler(signal.SIGINT)
+
+def is_background(text):
+    return text.endswith("&") and not text.endswith("&&") and not text.endswith("\\&")
+
+async def handle_line_async(text, session):
+    """
+    The asyncio side of the REPL: job control and `cmd &` / `inline --ask ... &`
+    background jobs; everything else goes to handle_line in a worker thread.
+    Returns False when the terminal should exit.
+    """
+    words = text.split()
+    if text == "jobs":
+        jobs.describe()
+    elif words and words[0] == "fg" and len(words) <= 2:
+        job = jobs.find(words[1] if len(words) == 2 else "")
+        if job is None:
+            print("fg: no such job")
+        else:
+            await wait_job(job)
+    elif len(words) == 2 and words[0] == "kill" and words[1].startswith("%"):
+        job = jobs.find(words[1])
+        if job is None or job.finished is not None:
+            print(f"kill: {words[1]}: no such job")
+        else:
+            jobs.kill(job)
+    elif text.startswith("inline --ask") and is_background(text):
+        Query, refresh = split_refresh_flag(text[len("inline --ask"):-1])
+        if Query.strip() == "":
+            print("You do not have asked anything")
+        else:
+            jobs.start(text, ask_job(Query, refresh))
+    elif is_background(text):
+        cmd = text[:-1].strip()
+        if text.startswith("inline"):
+            print("Only shell commands and inline --ask can run in the background")
+        elif not cmd:
+            print("Nothing to run in the background")
+        else:
+            rule = dangerous_rule(cmd)
+            if rule is not None:
+                print("POTENTIAL DANGEROUS COMMAND!!")
+                print(f"Matched rule: {rule}")
+                if not await confirm_async(session, "Do you want to Continue with the command?(Y/N): "):
+                    return True
+            jobs.start(cmd, shell_job(cmd))
+            suggestion_index.add(text)
+    else:
+        return await foreground(session, handle_line, text)
+    return True
+
+
+# Main loop
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="AI assisted inline terminal.")
+    batch = parser.add_argument_group("batch mode", "run without the interactive prompt, one JSON line per input line on stdout")
+    batch.add_argument("--batch", metavar="FILE", help="read commands and inline --ask/--execute queries from FILE (- for stdin)")
+    batch.add_argument("--workers", type=int, default=BATCH_WORKERS, help="queries translated concurrently (default %(default)s)")
+    batch.add_argument("--rate", type=float, default=gemini_rate_limit.rate, help="max Gemini requests per second, 0 for no limit (default %(default)s)")
+    batch.add_argument("--burst", type=int, default=gemini_rate_limit.burst, help="Gemini requests allowed at once above --rate (default %(default)s)")
+    batch.add_argument("--run", action="store_true", help="run the commands for real after the preview (default: translate and preview only)")
+    batch.add_argument("--dangerous", choices=("deny", "skip", "allow"), default="deny",
+                       help="with --run, dangerous commands fail the line (deny), are left out (skip) or run (allow)")
+    batch.add_argument("--keep-going", action="store_true", help="with --run, keep running the lines after a failed one")
+    batch.add_argument("--no-preview", action="store_true", help="skip the sandbox preview of inline --execute lines")
+    batch.add_argument("--refresh", action="store_true", help="ignore cached Gemini answers")
+    return parser.parse_args(argv)
+
+def batch_main(args):
+    gemini_rate_limit.configure(args.rate, args.burst)
+    if os.getenv('INLINE_PERSISTENT_SHELL') == '1':
+        set_shell_session(True)
+    if args.batch == "-":
+        lines = sys.stdin.readlines()
+    else:
+        with open(args.batch, encoding="utf-8") as source:
+            lines = source.readlines()
+    out = sys.stdout
+    # Progress and command output go to stderr so stdout is only JSON lines
+    with contextlib.redirect_stdout(sys.stderr):
+        return run_batch(lines, out, workers=args.workers, refresh=args.refresh, preview=not args.no_preview,
+                         dangerous=args.dangerous, execute=args.run, keep_going=args.keep_going)
+
+async def repl():
+    session = PromptSession(
+        completer=completer,
+        placeholder='⮞ Ctrl+T → Get AI CLI suggestions',
+        auto_suggest=AutoSuggestCmd(history_store),
+        key_bindings=bindings,
+        history=history,
+        bottom_toolbar=HTML('<b><style fg="cyan">⮞ Right Arrow: accept suggestion | Tab: autocomplete | Ctrl+T: get AI suggestions | inline --ask: ask Query | inline --execute: ask and execute Query | cmd &amp;: run in background, jobs / fg / kill %N | inline --contact: Get contact of Inline Team </style></b>')
+    )
+    while True:
+        try:
+            venv_prefix = f"({os.path.basename(os.environ['VIRTUAL_ENV'])}) " if 'VIRTUAL_ENV' in os.environ else ""
+            # Jobs that finish while the prompt is up print above it
+            with patch_stdout():
+                text = (await session.prompt_async(f"{venv_prefix}inlineTerminal<{os.getcwd()}> $ ")).strip()
+            history.append_string(text)
+            if not await handle_line_async(text, session):
+                break
+
+        except KeyboardInterrupt:
+            print("\n[KeyboardInterrupt] Type 'exit' to quit.")
+            continue
+        except EOFError:
+            print("\n[EOF] Exiting terminal.")
+            break
+    if jobs.running():
+        print(f"Killing {len(jobs.running())} running job(s)")
+        jobs.kill_all()
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.batch is not None:
+        sys.exit(batch_main(args))
+    if os.getenv('INLINE_PERSISTENT_SHELL') == '1':
+        set_shell_session(True)
+    threading.Thread(target=seed_suggestions_from_history, daemon=True).start()
+    venv_index.scan_async(os.getcwd())
+    executable_index.refresh_async()
+    asyncio.run(repl())
+
+
+if __name__ == "__main__":
+    main()
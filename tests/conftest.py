@@ -0,0 +1,26 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+# inline_terminal opens its history database and caches under INLINE_HOME at
+# import time; keep that out of the real home directory
+os.environ.setdefault("INLINE_HOME", tempfile.mkdtemp(prefix="inline-tests-"))
+os.environ.setdefault("INLINE_TRACE", "0")
+
+import pytest
+
+import inline_terminal as it
+from fake_gemini import FakeGeminiClient
+
+
+@pytest.fixture
+def client():
+    """A FakeGeminiClient (no latency) installed as the Gemini client for the test."""
+    client = FakeGeminiClient(latency=0, seed=1)
+    it.set_gemini_client(client)
+    yield client
+    it.set_gemini_client(None)
@@ -0,0 +1,36 @@
+import io
+import json
+
+import inline_terminal as it
+
+
+def run(lines, **kwargs):
+    out = io.StringIO()
+    code = it.run_batch(lines, out, preview=False, execute=True, **kwargs)
+    return code, [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def test_cd_carries_over_to_later_lines(tmp_path, monkeypatch):
+    (tmp_path / "sub").mkdir()
+    monkeypatch.chdir(tmp_path)
+    code, records = run(["cd sub\n", "pwd\n", "mkdir made_here\n"])
+    assert code == 0
+    assert records[1]["output"].strip() == str(tmp_path / "sub")
+    assert (tmp_path / "sub" / "made_here").is_dir()
+
+
+def test_cd_without_a_session(tmp_path, monkeypatch):
+    (tmp_path / "sub").mkdir()
+    monkeypatch.chdir(tmp_path)
+    assert it.run_batch_command("cd sub").returncode == 0
+    assert it.run_batch_command("mkdir made_here").returncode == 0
+    assert (tmp_path / "sub" / "made_here").is_dir()
+    assert it.run_batch_command("cd missing").returncode == 1
+
+
+def test_failed_line_stops_the_batch(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    code, records = run(["cd missing\n", "mkdir made_here\n"])
+    assert code == 1
+    assert [record["status"] for record in records] == ["failed", "skipped"]
+    assert not (tmp_path / "made_here").exists()
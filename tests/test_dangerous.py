@@ -0,0 +1,53 @@
+import random
+import re
+
+import inline_terminal as it
+
+
+def naive_rule(patterns, cmd):
+    """The per-pattern loop the matcher replaces: the first declared rule that matches."""
+    return next((p for p in patterns if re.search(p, cmd, re.IGNORECASE)), None)
+
+
+# Rules without a literal anchor (fallback rules) declared so that a later one
+# matches further left than an earlier one
+OUT_OF_ORDER = [
+    r"(?:--wipe|--purge)\s+all",
+    r"\b(?:a|b)+\s+--wipe",
+    r"\btool\d+\s+--force",
+    r"(?:rm|del)\s+-rf\s+/",
+    r"(?:x|y)z+",
+]
+
+WORDS = ["ls", "rm", "-rf", "/", "--wipe", "all", "--purge", "aab", "tool7", "--force", "sudo",
+         "del", "xzz", "yz", "git", "push", "--force", "mkfs.ext4", "/dev/sda", "chmod", "777",
+         "shutdown", "-h", "now", "dd", "if=/dev/zero", "of=/dev/sda", "echo", "hi", "|", "&&"]
+
+
+def random_commands(count, seed=1):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 8))) for _ in range(count)]
+
+
+def test_fallback_rules_report_the_earliest_declared():
+    matcher = it.DangerousCommandMatcher(OUT_OF_ORDER)
+    # `ab --wipe` (rule 1) is left of `--wipe all` (rule 0); rule 0 was declared first
+    assert matcher.match("ab --wipe all") == OUT_OF_ORDER[0]
+    assert matcher.match("xz && rm -rf /") == OUT_OF_ORDER[3]
+    assert matcher.match("ls -la") is None
+
+
+def test_matches_the_naive_loop():
+    patterns = it.DANGEROUS_COMMAND_PATTERNS + OUT_OF_ORDER + [r"\btool1\b", r"\bgit\s+push\s+--force"]
+    matcher = it.DangerousCommandMatcher(patterns)
+    for cmd in random_commands(5000):
+        assert matcher.match(cmd) == naive_rule(patterns, cmd), cmd
+
+
+def test_rules_the_combined_regex_cannot_hold():
+    # the same group name in two rules makes the combined alternation fail to compile
+    patterns = [r"(?P<verb>wipe)\s+all", r"(?P<verb>x|y)z+"] + OUT_OF_ORDER
+    matcher = it.DangerousCommandMatcher(patterns)
+    assert matcher._fallback is None
+    for cmd in random_commands(2000, seed=2) + ["xz wipe all"]:
+        assert matcher.match(cmd) == naive_rule(patterns, cmd), cmd
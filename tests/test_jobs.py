@@ -0,0 +1,91 @@
+import asyncio
+import os
+import signal
+import threading
+
+import pytest
+
+import inline_terminal as it
+
+
+class FakeSession:
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.questions = []
+        self.toolbars = []
+
+    async def prompt_async(self, question, **kwargs):
+        self.questions.append(question)
+        self.toolbars.append(kwargs.get("bottom_toolbar"))
+        answer = self.answers.pop(0)
+        if isinstance(answer, BaseException):
+            raise answer
+        return answer
+
+
+def test_questions_go_through_the_session():
+    session = FakeSession(["maybe", "y"])
+    result = asyncio.run(it.foreground(session, lambda text, confirm: (text, confirm("Go?(Y/N): ")), "ls"))
+    assert result == ("ls", True)
+    assert session.questions == ["Go?(Y/N): ", "Go?(Y/N): "]
+
+
+def test_questions_can_show_a_toolbar():
+    class Preview:
+        done = threading.Event()
+
+    session = FakeSession(["n"])
+    work = lambda confirm: confirm("Go?(Y/N): ", toolbar=it.preview_toolbar(Preview()))
+    assert asyncio.run(it.foreground(session, work)) is False
+    assert session.toolbars[0]() == "sandbox preview: running... (N cancels it)"
+
+
+def test_ctrl_c_at_a_question_cancels_the_wait():
+    answered = []
+
+    def work(confirm):
+        answered.append(confirm("Go?(Y/N): "))
+        answered.append(confirm("Again?(Y/N): "))
+
+    with pytest.raises(KeyboardInterrupt):
+        asyncio.run(it.foreground(FakeSession([KeyboardInterrupt()]), work))
+    # the second question is never shown once the work was abandoned
+    assert answered == [False, False]
+
+
+@pytest.mark.skipif(os.name == "nt", reason="SIGINT handlers need a POSIX event loop")
+def test_ctrl_c_while_waiting_cancels_the_wait():
+    release = threading.Event()
+    seen = []
+
+    def work(confirm):
+        release.wait(5)
+        seen.append(it.foreground_cancelled())
+
+    async def main():
+        asyncio.get_running_loop().call_later(0.05, os.kill, os.getpid(), signal.SIGINT)
+        await it.foreground(FakeSession([]), work)
+
+    with pytest.raises(KeyboardInterrupt):
+        asyncio.run(main())
+    release.set()
+    for _ in range(100):
+        if seen:
+            break
+        threading.Event().wait(0.01)
+    assert seen == [True]
+
+
+def test_ask_streams_in_the_foreground_unless_backgrounded(client, capsys, monkeypatch, tmp_path):
+    monkeypatch.setattr(it, "response_cache", it.ResponseCache(str(tmp_path / "cache.json")))
+
+    async def main(text):
+        await it.handle_line_async(text, FakeSession([]))
+        await asyncio.gather(*(job.task for job in it.jobs.running()), return_exceptions=True)
+
+    asyncio.run(main("inline --ask list the files"))
+    out = capsys.readouterr().out
+    assert out.strip() and not out.startswith("[")
+    asyncio.run(main("inline --ask list the files again &"))
+    out = capsys.readouterr().out
+    assert out.startswith("[") and "Done" in out
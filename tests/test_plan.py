@@ -0,0 +1,60 @@
+import sys
+
+import inline_terminal as it
+
+
+def deps(cmds, base):
+    return [sorted(step.deps) for step in it.plan_commands(cmds, base=str(base))]
+
+
+def test_three_sub_projects_run_in_parallel(tmp_path):
+    for name in ("frontend", "backend", "worker"):
+        (tmp_path / name).mkdir()
+    cmds = ["cd frontend && npm install", "cd backend && pip install -r requirements.txt",
+            "cd worker && npm ci"]
+    assert deps(cmds, tmp_path) == [[], [], []]
+
+
+def test_sibling_paths_are_independent(tmp_path):
+    assert deps(["mkdir a", "mkdir b"], tmp_path) == [[], []]
+    assert deps(["npm install --prefix a", "npm install --prefix b"], tmp_path) == [[], []]
+    assert deps(["cd a && pip install -r requirements.txt",
+                 "cd b && pip install -r requirements.txt"], tmp_path) == [[], []]
+
+
+def test_overlapping_paths_are_ordered(tmp_path):
+    assert deps(["mkdir build", "touch build/out.txt"], tmp_path) == [[], [0]]
+    assert deps(["mkdir a", "cd a && npm install"], tmp_path) == [[], [0]]
+    assert deps(["npm install", "npm install"], tmp_path) == [[], [0]]
+    assert deps(["git add .", "touch a.txt"], tmp_path) == [[], [0]]
+
+
+def test_state_commands_prefix_later_steps(tmp_path):
+    steps = it.plan_commands(["conda activate dev", "conda install numpy", "cd src", "ls"], base=str(tmp_path))
+    assert [step.command for step in steps] == ["conda install numpy", "ls"]
+    assert steps[0].script == "conda activate dev && conda install numpy"
+    assert steps[1].script == "conda activate dev && cd src && ls"
+    assert steps[1].cwd == str(tmp_path / "src")
+
+
+def test_failed_step_stops_only_its_dependents(tmp_path, capsys):
+    steps = it.plan_commands(["mkdir a", "false a/x.txt", "cat a/x.txt", "mkdir b"], base=str(tmp_path))
+    steps[1].script = f'"{sys.executable}" -c "raise SystemExit(3)"'
+    for step in steps:
+        step.script = f"cd {tmp_path} && {step.script}"
+    results = it.run_plan(steps, workers=2)
+    assert results == {0: 0, 1: 3, 2: None, 3: 0}
+    assert (tmp_path / "b").is_dir()
+    assert "skipped" in capsys.readouterr().out
+
+
+def test_empty_arguments_are_not_paths(tmp_path):
+    assert deps(['git commit -m ""', "echo ''", "ls"], tmp_path) == [[], [], []]
+
+
+def test_parallel_flag_is_validated(capsys):
+    assert it.split_execute_flags(" --parallel=3 list files") == ("list files", False, 3, it.EXECUTE_PIPELINED)
+    for bad in ("x", "0", "-2", ""):
+        query, _, workers, _ = it.split_execute_flags(f" --parallel={bad} list files")
+        assert (query, workers) == ("list files", None)
+        assert "Usage" in capsys.readouterr().out
@@ -0,0 +1,63 @@
+import pytest
+
+import inline_terminal as it
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = it.ResponseCache(str(tmp_path / "response_cache.json"), max_entries=3, ttl=60)
+    monkeypatch.setattr(it, "response_cache", cache)
+    return cache
+
+
+def test_key_keeps_case_and_collapses_whitespace():
+    key = it.ResponseCache.make_key
+    assert key("execute", "rename Foo.txt to foo.txt", "t") != key("execute", "rename foo.txt to Foo.txt", "t")
+    assert key("execute", "  list   files ", "t") == key("execute", "list files", "t")
+
+
+def test_execute_miss_then_hit(cache, client):
+    first = it.executeQuery("list the files")
+    assert client.calls == 1
+    assert it.executeQuery("list the files") == first
+    assert client.calls == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_refresh_skips_the_cache(cache, client):
+    it.executeQuery("list the files")
+    it.executeQuery("list the files", refresh=True)
+    assert client.calls == 2
+    query, refresh = it.split_refresh_flag(" --refresh list the files")
+    assert (query.strip(), refresh) == ("list the files", True)
+
+
+def test_ask_answer_is_cached(cache, client):
+    answer = it.askQuestions("how to list files", echo=False)
+    assert it.askQuestions("how to list files", echo=False) == answer
+    assert client.calls == 1
+
+
+def test_entries_expire_after_ttl(cache, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(it.time, "time", lambda: now[0])
+    cache.put("k", ["ls"])
+    now[0] += 59
+    assert cache.get("k") == ["ls"]
+    now[0] += 2
+    assert cache.get("k") is None
+
+
+def test_least_recently_used_entry_is_evicted(cache):
+    for key in ("a", "b", "c"):
+        cache.put(key, [key])
+    cache.get("a")
+    cache.put("d", ["d"])
+    assert cache.get("b") is None
+    assert [cache.get(key) for key in ("a", "c", "d")] == [["a"], ["c"], ["d"]]
+
+
+def test_entries_survive_a_reload(cache, tmp_path):
+    cache.put("k", ["ls"])
+    reloaded = it.ResponseCache(cache.path, max_entries=3, ttl=60)
+    assert reloaded.get("k") == ["ls"]
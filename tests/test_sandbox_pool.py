@@ -0,0 +1,165 @@
+import os
+import stat
+import subprocess
+import sys
+import time
+
+import pytest
+
+import inline_terminal as it
+
+FAKE_DOCKER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks", "fake_docker.py")
+
+
+@pytest.fixture
+def docker(tmp_path, monkeypatch):
+    """A `docker` script running benchmarks/fake_docker.py; returns (path, state dir)."""
+    path = tmp_path / "docker"
+    path.write_text(f"#!/bin/sh\nexec {sys.executable} {FAKE_DOCKER} \"$@\"\n")
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    state = tmp_path / "state"
+    state.mkdir()
+    monkeypatch.setenv("FAKE_DOCKER_STATE", str(state))
+    monkeypatch.setenv("FAKE_DOCKER_START_DELAY", "0.05")
+    return str(path), state
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def make_pool(docker, **kwargs):
+    kwargs.setdefault("size", 1)
+    kwargs.setdefault("start_timeout", 10)
+    return it.SandboxPool(docker=docker[0], **kwargs)
+
+
+def test_each_preview_gets_a_fresh_container(docker):
+    pool = make_pool(docker)
+    try:
+        pool.start()
+        first = pool.acquire()
+        pool.release(first)
+        # the used container is removed and a new one takes its place
+        assert wait_for(lambda: not (docker[1] / first).exists())
+        second = pool.acquire()
+        assert second != first
+        pool.release(second)
+        assert it.SandboxPreview("echo hello", pool=pool).wait(10).strip() == "hello"
+    finally:
+        pool.close()
+
+
+def test_close_while_spawning_leaves_no_container(docker, monkeypatch):
+    monkeypatch.setenv("FAKE_DOCKER_START_DELAY", "0.5")
+    pool = make_pool(docker, size=2)
+    pool.start()
+    pool.close()
+    with pytest.raises(it.SandboxUnavailable):
+        pool.acquire()
+    # the spawns finish after close() and must clean up after themselves
+    time.sleep(1.0)
+    assert wait_for(lambda: pool._starting == 0)
+    assert wait_for(lambda: not os.listdir(docker[1]))
+
+
+def test_failed_startup_raises_sandbox_unavailable(docker, monkeypatch):
+    monkeypatch.setenv("FAKE_DOCKER_RUN_FAIL", "1")
+    pool = make_pool(docker)
+    try:
+        with pytest.raises(it.SandboxUnavailable, match="Unable to find image"):
+            pool.acquire()
+    finally:
+        pool.close()
+
+
+def test_missing_docker_raises_sandbox_unavailable(tmp_path):
+    pool = it.SandboxPool(size=1, docker=str(tmp_path / "no-docker"), start_timeout=5)
+    with pytest.raises(it.SandboxUnavailable):
+        pool.acquire()
+    pool.close()
+
+
+def test_preview_runs_in_a_warm_container(docker, monkeypatch):
+    monkeypatch.setattr(it, "DOCKER", "no-such-docker")
+    pool = make_pool(docker)
+    try:
+        pool.start()
+        assert wait_for(lambda: pool._idle)
+        warm = pool._idle[0]
+        done = []
+        preview = it.SandboxPreview("echo from the pool", pool=pool, on_done=done.append)
+        assert preview.wait(10).strip() == "from the pool"
+        assert done == [preview.result]
+        # the used container is recycled
+        assert wait_for(lambda: not (docker[1] / warm).exists())
+    finally:
+        pool.close()
+
+
+def test_runaway_preview_is_killed_at_the_timeout(docker):
+    pool = make_pool(docker, exec_timeout=0.5)
+    try:
+        pool.start()
+        assert wait_for(lambda: pool._idle)
+        started = time.monotonic()
+        assert it.SandboxPreview("sleep 10", pool=pool).wait(10) == it.SANDBOX_TIMEOUT_MESSAGE
+        assert time.monotonic() - started < 5
+    finally:
+        pool.close()
+
+
+def test_preview_falls_back_to_a_one_off_run(docker, monkeypatch):
+    # a pool without containers: the preview still uses the pool's docker
+    monkeypatch.setattr(it, "DOCKER", "no-such-docker")
+    pool = make_pool(docker, size=0)
+    try:
+        preview = it.SandboxPreview("echo cold", pool=pool)
+        assert preview.wait(10).strip() == "cold"
+        assert preview._cold_name is not None
+    finally:
+        pool.close()
+
+
+def test_cancel_stops_the_preview(docker):
+    pool = make_pool(docker)
+    try:
+        pool.start()
+        assert wait_for(lambda: pool._idle)
+        done = []
+        started = time.monotonic()
+        preview = it.SandboxPreview("sleep 10", pool=pool, on_done=done.append)
+        time.sleep(0.3)
+        preview.cancel()
+        assert preview.done.wait(5)
+        assert time.monotonic() - started < 5
+        assert done == []
+    finally:
+        pool.close()
+
+
+def test_containers_of_dead_terminals_are_removed_on_start(docker):
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+
+    def leftover(owner):
+        result = subprocess.run([docker[0], "run", "-d", "--label", f"{it.SANDBOX_LABEL}={owner}",
+                                 "ubuntu", "sleep", "infinity"], capture_output=True, text=True)
+        return result.stdout.strip()
+
+    stale = leftover(dead.pid)
+    unlabelled_owner = leftover("")
+    alive = leftover(os.getpid())
+    pool = make_pool(docker)
+    try:
+        pool.start()
+        assert wait_for(lambda: not (docker[1] / stale).exists())
+        assert wait_for(lambda: not (docker[1] / unlabelled_owner).exists())
+        assert (docker[1] / alive).exists()
+    finally:
+        pool.close()
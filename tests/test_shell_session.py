@@ -0,0 +1,45 @@
+import io
+import os
+
+import pytest
+
+import inline_terminal as it
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="persistent sessions need a POSIX shell")
+
+
+@pytest.fixture(params=["/bin/bash", "/bin/sh"])
+def session(request, tmp_path, monkeypatch):
+    if not os.path.exists(request.param):
+        pytest.skip(f"no {request.param}")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("PATH", os.environ["PATH"])
+    session = it.ShellSession(shell=request.param)
+    yield session
+    session.close()
+
+
+def run(session, cmd):
+    return session.run(cmd, out=io.BytesIO()).stdout.strip()
+
+
+def test_activate_keeps_the_shells_own_path_entries(session, tmp_path):
+    venv = tmp_path / "vv"
+    (venv / "bin").mkdir(parents=True)
+    (venv / "pyvenv.cfg").write_text("home = /usr/bin\n")
+    run(session, "export PATH=/my/tools:$PATH")
+    assert it.activate_venv(str(venv))
+    try:
+        entries = run(session, 'echo "$PATH"').split(os.pathsep)
+        assert entries[:2] == [str(venv / "bin"), "/my/tools"]
+    finally:
+        assert it.deactivate_venv()
+    entries = run(session, 'echo "$PATH"').split(os.pathsep)
+    assert entries[0] == "/my/tools"
+    assert str(venv / "bin") not in entries
+    assert run(session, 'echo "${VIRTUAL_ENV-unset}"') == "unset"
+
+
+def test_other_variables_are_pushed_whole(session, monkeypatch):
+    monkeypatch.setenv("INLINE_TEST_VALUE", "a b")
+    assert run(session, 'echo "$INLINE_TEST_VALUE"') == "a b"
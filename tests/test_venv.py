@@ -0,0 +1,22 @@
+import os
+
+import inline_terminal as it
+
+
+def make_venv(path, prompt=None):
+    (path / "bin").mkdir(parents=True)
+    cfg = "home = /usr/bin\nversion = 3.11.7\n"
+    if prompt is not None:
+        cfg += f"prompt = {prompt}\n"
+    (path / "pyvenv.cfg").write_text(cfg)
+
+
+def test_completion_matches_the_prompt_name(tmp_path):
+    make_venv(tmp_path / "proj" / ".venv", prompt="'bee'")
+    make_venv(tmp_path / "other" / "env")
+    index = it.VenvIndex()
+    index.scan(str(tmp_path))
+    assert index.get(str(tmp_path / "proj" / ".venv")).name == "bee"
+    assert [shown for shown, _ in index.ranked(str(tmp_path), "bee")] == [os.path.join("proj", ".venv")]
+    assert [shown for shown, _ in index.ranked(str(tmp_path), "env")] == [os.path.join("other", "env")]
+    assert [shown for shown, _ in index.ranked(str(tmp_path), "proj" + os.sep)] == [os.path.join("proj", ".venv")]